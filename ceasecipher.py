@@ -1,37 +1,251 @@
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, filedialog
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import argparse
+import codecs
+import os
+import queue
 import string
-from collections import Counter
+import sys
 import threading
 import time
 import re
-import json
 from datetime import datetime
 
+from cipher_core import DEFAULT_CONFIDENCE, SAMPLE_TEXTS, SCORERS, CaesarEngine, IncrementalStats
+from cipher_dictionary import PatternMatcher, load_wordlist
+from cipher_document import LARGE_DOCUMENT_BYTES, MappedDocument
+from cipher_histogram import DEFAULT_RANGE_BYTES
+from cipher_history import DEFAULT_LOG_PATH, HistoryEntry, HistoryLog
+from cipher_profiling import PROFILER, stage
+from cipher_report import DECODED_MODES, DEFAULT_PREVIEW_LENGTH, DEFAULT_REPORT_CHUNK_SIZE, REPORT_FORMATS, run_report, write_report
+from cipher_stream import DEFAULT_CHUNK_SIZE, run_decode
+
+# Inputs at least this long are auto-detected from the shortest decisive prefix
+PROGRESSIVE_MIN_CHARS = 100000
+
+# Words the live statistics look for in the decoded text until a word list is loaded
+LIVE_WORDS = PatternMatcher(['THE', 'AND', 'TO', 'OF', 'A', 'IN', 'FOR', 'IS', 'ON', 'THAT'])
+
+# Entries shown in the History tab, newest first
+HISTORY_DISPLAY_ROWS = 10
+
+# tkinter is imported on first window so headless callers never load it
+tk = ttk = scrolledtext = messagebox = filedialog = None
+
+
+def _load_tkinter():
+    """Import tkinter modules into this module on demand"""
+    global tk, ttk, scrolledtext, messagebox, filedialog
+    if tk is None:
+        import tkinter
+        from tkinter import ttk, scrolledtext, messagebox, filedialog
+        tk = tkinter
+
+
+# Result the live-analysis worker queues when compute() raised
+_FAILED = object()
+
+
+class LiveAnalysisScheduler:
+    """Debounce edits, run compute() on a worker thread and apply() its latest result on the Tk thread"""
+    
+    def __init__(self, root, snapshot, compute, apply, delay_ms=200, poll_ms=20):
+        self.root = root
+        self.snapshot = snapshot
+        self.compute = compute
+        self.apply = apply
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+        
+        self._after_id = None
+        self._poll_id = None
+        self._generation = 0
+        self._job = None
+        self._results = queue.Queue()
+        self._condition = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="live-analysis", daemon=True)
+        self._worker.start()
+    
+    def schedule(self):
+        """Restart the quiet-period timer; call on every edit"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.delay_ms, self._submit)
+    
+    def cancel(self):
+        """Forget any pending or running job"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        with self._condition:
+            self._generation += 1
+            self._job = None
+    
+    def _submit(self):
+        self._after_id = None
+        args = self.snapshot()
+        with self._condition:
+            self._generation += 1
+            self._job = (self._generation, args) if args is not None else None
+            self._condition.notify()
+        if args is None:
+            # Nothing to wait for; a result still computing is stale and gets dropped
+            if self._poll_id is not None:
+                self.root.after_cancel(self._poll_id)
+                self._poll_id = None
+        elif self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._job is None:
+                    self._condition.wait()
+                generation, args = self._job
+                self._job = None
+            try:
+                result = self.compute(*args)
+            except Exception:
+                result = _FAILED
+            self._results.put((generation, result))
+    
+    def _poll(self):
+        """Tk thread: apply the current job's result, or look again shortly"""
+        self._poll_id = None
+        while True:
+            try:
+                generation, result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self._generation:
+                if result is not _FAILED:
+                    self.apply(result)
+                return
+        self._poll_id = self.root.after(self.poll_ms, self._poll)
+
+
+class FrequencyCharts:
+    """The four Deep Analysis charts, built once and updated in place and redrawn when Tk is idle"""
+    
+    DIGRAM_BARS = 8
+    TRIGRAM_BARS = 6
+    
+    def __init__(self, parent, english_freq, canvas_class=None):
+        # matplotlib is only loaded once a chart is actually drawn
+        from matplotlib.figure import Figure
+        if canvas_class is None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg as canvas_class
+        
+        self.figure = Figure(figsize=(12, 10))
+        self.figure.patch.set_facecolor('#2b2b2b')
+        (ax1, ax2), (ax3, ax4) = self.figure.subplots(2, 2)
+        self.axes = (ax1, ax2, ax3, ax4)
+        
+        # Letter frequency
+        letters = list(string.ascii_uppercase)
+        self.letter_bars = ax1.bar(letters, [0] * 26, color='#ff6b6b', alpha=0.8, label='Input Text')
+        self.english_max = max(english_freq.values())
+        ax1.bar(letters, [english_freq[letter] for letter in letters], color='#4ecdc4', alpha=0.6, label='English')
+        ax1.set_title('Letter Frequency Comparison', color='white', fontsize=11)
+        ax1.legend()
+        
+        # Digram and trigram frequency
+        self.digram_bars = ax2.bar(range(self.DIGRAM_BARS), [0] * self.DIGRAM_BARS, color='#95e1d3', alpha=0.8)
+        ax2.set_title('Most Common Digrams', color='white', fontsize=11)
+        self.trigram_bars = ax3.bar(range(self.TRIGRAM_BARS), [0] * self.TRIGRAM_BARS, color='#f8b500', alpha=0.8)
+        ax3.set_title('Most Common Trigrams', color='white', fontsize=11)
+        for ax, slots in ((ax2, self.DIGRAM_BARS), (ax3, self.TRIGRAM_BARS)):
+            ax.set_xticks(range(slots))
+        
+        # Pattern analysis
+        self.quality_line, = ax4.plot(range(1, 26), [0] * 25, color='#00ff41', linewidth=2, marker='o', markersize=4)
+        ax4.set_title('Shift Quality Analysis', color='white', fontsize=11)
+        ax4.set_xlabel('Shift Value', color='white')
+        ax4.set_ylabel('Quality Score', color='white')
+        ax4.grid(True, alpha=0.3)
+        
+        for ax in self.axes:
+            ax.tick_params(colors='white', labelsize=8)
+            ax.set_facecolor('#3b3b3b')
+        self.figure.tight_layout()
+        
+        # Embed in GUI
+        self.canvas = canvas_class(self.figure, parent)
+        self.widget = self.canvas.get_tk_widget()
+        self.widget.pack(fill=tk.BOTH, expand=True)
+        self._render_pending = False
+    
+    def update(self, letter_freq, digram_freq, trigram_freq, quality_scores):
+        """Replace bar heights, labels and line data, then schedule a redraw"""
+        ax1, ax2, ax3, ax4 = self.axes
+        
+        heights = [letter_freq.get(letter, 0) for letter in string.ascii_uppercase]
+        for bar, height in zip(self.letter_bars, heights):
+            bar.set_height(height)
+        ax1.set_ylim(0, max(heights + [self.english_max]) * 1.05)
+        
+        self._update_ranked(ax2, self.digram_bars, digram_freq)
+        self._update_ranked(ax3, self.trigram_bars, trigram_freq)
+        
+        self.quality_line.set_ydata(quality_scores)
+        ax4.relim()
+        ax4.autoscale_view()
+        
+        self.schedule_render()
+    
+    def schedule_render(self):
+        """Render once Tk is idle, coalescing repeated updates"""
+        if not self._render_pending:
+            self._render_pending = True
+            self.widget.after_idle(self._render)
+    
+    def _render(self):
+        self._render_pending = False
+        with stage('chart_render'):
+            self.canvas.draw()
+    
+    def _update_ranked(self, ax, bars, freq):
+        items = list(freq.items())[:len(bars)]
+        items += [('', 0)] * (len(bars) - len(items))
+        for bar, (gram, count) in zip(bars, items):
+            bar.set_height(count)
+        ax.set_xticklabels([gram for gram, count in items])
+        ax.set_ylim(0, max(1, max(count for gram, count in items)) * 1.05)
+
+
 class EnhancedCaesarDecoder:
     def __init__(self, root):
+        _load_tkinter()
         self.root = root
         self.root.title("🔐 Advanced Caesar Cipher Decoder v2.0")
         self.root.geometry("1400x900")
         self.root.configure(bg='#1a1a1a')
         
-        # Enhanced English letter frequencies with digrams
-        self.english_freq = {
-            'A': 8.12, 'B': 1.49, 'C': 2.78, 'D': 4.25, 'E': 12.02, 'F': 2.23,
-            'G': 2.02, 'H': 6.09, 'I': 6.97, 'J': 0.15, 'K': 0.77, 'L': 4.03,
-            'M': 2.41, 'N': 6.75, 'O': 7.51, 'P': 1.93, 'Q': 0.10, 'R': 5.99,
-            'S': 6.33, 'T': 9.06, 'U': 2.76, 'V': 0.98, 'W': 2.36, 'X': 0.15,
-            'Y': 1.97, 'Z': 0.07
-        }
+        # Headless analysis engine shared by every view
+        self.engine = CaesarEngine()
+        self.english_freq = self.engine.english_freq
+        self.common_digrams = self.engine.common_digrams
+        self.common_trigrams = self.engine.common_trigrams
         
-        # Common English digrams
-        self.common_digrams = ['TH', 'HE', 'IN', 'ER', 'AN', 'ED', 'ND', 'TO', 'EN', 'TI']
-        self.common_trigrams = ['THE', 'AND', 'ING', 'HER', 'HAT', 'HIS', 'THA', 'ERE', 'FOR', 'ENT']
+        # Substring matcher behind the live "Word Matches" statistic
+        self.live_words = LIVE_WORDS
         
-        # Decryption history
-        self.history = []
+        # Decryption history: bounded in memory, persisted to an append-only log
+        self.history = HistoryLog(path=DEFAULT_LOG_PATH)
+        try:
+            self.history.replay()
+        except OSError:
+            pass
+        self.history_rendered_seq = 0
+        
+        # Deep Analysis charts, created on first use
+        self.charts = None
+        
+        # Large files stay memory-mapped and are shown a page at a time
+        self.document = None
+        self.document_page = 0
+        self.document_sample = None
         
         self.setup_ui()
         self.setup_styles()
@@ -98,6 +312,22 @@ class EnhancedCaesarDecoder:
         self.input_text.pack(fill=tk.BOTH, expand=True)
         self.input_text.bind('<KeyRelease>', self.on_text_change)
         
+        # Page controls, shown only while a large document is open
+        self.page_frame = tk.Frame(input_frame, bg='#2b2b2b')
+        for text, step in (("⏮", -10 ** 9), ("◀", -1), ("▶", 1), ("⏭", 10 ** 9)):
+            tk.Button(self.page_frame, text=text, command=lambda step=step: self.move_document_page(step),
+                     bg='#3b3b3b', fg='white', relief='flat', font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=2)
+        self.page_label = tk.Label(self.page_frame, fg='#00ff41', bg='#2b2b2b', font=('Arial', 9, 'bold'))
+        self.page_label.pack(side=tk.LEFT, padx=5)
+        
+        # Letter and n-gram counts follow each edit instead of being recounted
+        self.input_stats = IncrementalStats()
+        self.track_input_edits()
+        
+        # Bursts of keystrokes are coalesced and analysed off the Tk thread
+        self.live_scheduler = LiveAnalysisScheduler(self.root, self.live_snapshot,
+                                                    self.compute_live_result, self.show_live_result)
+        
         # Smart controls
         control_frame = tk.Frame(input_frame, bg='#2b2b2b')
         control_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -111,6 +341,8 @@ class EnhancedCaesarDecoder:
                  bg='#cc3300', fg='white', relief='flat', font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=2)
         tk.Button(control_frame, text="🎲 Sample", command=self.load_random_sample,
                  bg='#6600cc', fg='white', relief='flat', font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=2)
+        tk.Button(control_frame, text="📖 Words", command=self.load_dictionary,
+                 bg='#996600', fg='white', relief='flat', font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=2)
         
         # Advanced shift controls
         shift_frame = tk.Frame(input_frame, bg='#2b2b2b')
@@ -122,6 +354,18 @@ class EnhancedCaesarDecoder:
                                width=5, bg='#1e1e1e', fg='white', buttonbackground='#3b3b3b')
         shift_spin.pack(side=tk.LEFT, padx=5)
         
+        tk.Label(shift_frame, text="🧮 Scorer:", fg='#00ff41', bg='#2b2b2b', font=('Arial', 10, 'bold')).pack(side=tk.LEFT)
+        self.scorer_var = tk.StringVar(value=self.engine.scorer)
+        scorer_menu = tk.OptionMenu(shift_frame, self.scorer_var, *SCORERS, command=self.set_scorer)
+        scorer_menu.config(bg='#1e1e1e', fg='white', relief='flat', highlightthickness=0)
+        scorer_menu.pack(side=tk.LEFT, padx=5)
+        
+        # Scores of different language profiles are not calibrated against each other,
+        # so Auto-Detect only compares them when asked to
+        self.all_languages_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(shift_frame, text="🌐 All languages", variable=self.all_languages_var,
+                      fg='#00ff41', bg='#2b2b2b', selectcolor='#1e1e1e', activebackground='#2b2b2b').pack(side=tk.LEFT, padx=5)
+        
         tk.Button(shift_frame, text="🔍 Auto-Detect", command=self.smart_auto_detect,
                  bg='#ff6600', fg='white', relief='flat', font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=5)
         tk.Button(shift_frame, text="⚡ Quick Decode", command=self.quick_decode,
@@ -141,6 +385,11 @@ class EnhancedCaesarDecoder:
                                                     font=('Consolas', 10))
         self.output_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
+        # Scrolling past either end of a document page turns the page
+        for widget in (self.input_text, self.output_text):
+            for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+                widget.bind(sequence, self.on_document_scroll, add='+')
+        
         # Real-time stats
         stats_frame = tk.LabelFrame(right_frame, text="📊 Live Statistics", font=('Arial', 11, 'bold'),
                                    fg='#00ff41', bg='#2b2b2b', bd=2)
@@ -150,6 +399,15 @@ class EnhancedCaesarDecoder:
                                     font=('Consolas', 9), state='disabled')
         self.stats_display.pack(fill=tk.X, padx=5, pady=5)
         
+        # Stage timings, off unless switched on here or via CEASECIPHER_PROFILE
+        profile_frame = tk.Frame(stats_frame, bg='#2b2b2b')
+        profile_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+        self.profile_var = tk.BooleanVar(value=PROFILER.enabled)
+        tk.Checkbutton(profile_frame, text="⏱️ Profile stages", variable=self.profile_var, command=self.toggle_profiling,
+                      fg='#00ff41', bg='#2b2b2b', selectcolor='#1e1e1e', activebackground='#2b2b2b').pack(side=tk.LEFT)
+        tk.Button(profile_frame, text="📤 Export Metrics", command=self.export_metrics,
+                 bg='#0066cc', fg='white', relief='flat', font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=5)
+        
     def create_advanced_analysis_tab(self):
         analysis_frame = ttk.Frame(self.notebook)
         self.notebook.add(analysis_frame, text="📈 Advanced Analysis")
@@ -225,89 +483,30 @@ class EnhancedCaesarDecoder:
                                                         font=('Consolas', 9), insertbackground='white')
         self.history_display.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-    def caesar_decrypt(self, text, shift):
-        """Enhanced Caesar decryption with better handling"""
-        result = ""
-        for char in text:
-            if char.isalpha():
-                ascii_offset = 65 if char.isupper() else 97
-                decrypted_char = chr((ord(char) - ascii_offset - shift) % 26 + ascii_offset)
-                result += decrypted_char
-            else:
-                result += char
-        return result
-    
-    def get_enhanced_frequency(self, text):
-        """Enhanced frequency analysis with additional metrics"""
-        letters_only = ''.join([c.upper() for c in text if c.isalpha()])
-        if not letters_only:
-            return {}, {}, {}
-        
-        total_letters = len(letters_only)
-        freq_count = Counter(letters_only)
-        
-        # Letter frequency
-        letter_freq = {letter: (freq_count.get(letter, 0) / total_letters) * 100 
-                      for letter in string.ascii_uppercase}
-        
-        # Digram frequency
-        digrams = [letters_only[i:i+2] for i in range(len(letters_only)-1)]
-        digram_count = Counter(digrams)
-        digram_freq = {digram: count for digram, count in digram_count.most_common(10)}
-        
-        # Trigram frequency
-        trigrams = [letters_only[i:i+3] for i in range(len(letters_only)-2)]
-        trigram_count = Counter(trigrams)
-        trigram_freq = {trigram: count for trigram, count in trigram_count.most_common(10)}
-        
-        return letter_freq, digram_freq, trigram_freq
-    
-    def calculate_enhanced_score(self, text):
-        """Enhanced scoring system"""
-        letter_freq, digram_freq, trigram_freq = self.get_enhanced_frequency(text)
-        
-        # Chi-squared for letters
-        chi_squared = 0
-        for letter in string.ascii_uppercase:
-            expected = self.english_freq[letter]
-            observed = letter_freq.get(letter, 0)
-            if expected > 0:
-                chi_squared += ((observed - expected) ** 2) / expected
-        
-        # Bonus for common English patterns
-        pattern_score = 0
-        text_upper = text.upper()
-        
-        # Check for common digrams
-        for digram in self.common_digrams:
-            pattern_score += text_upper.count(digram) * 2
-        
-        # Check for common trigrams
-        for trigram in self.common_trigrams:
-            pattern_score += text_upper.count(trigram) * 3
-        
-        # Combined score (lower is better)
-        return chi_squared - pattern_score
-    
     def smart_auto_detect(self):
         """Enhanced auto-detection with pattern recognition"""
-        text = self.input_text.get(1.0, tk.END).strip()
+        with stage('widget_read'):
+            text = self.input_content()
         if not text:
             messagebox.showwarning("Warning", "Please enter text to analyze!")
             return
         
-        best_shift = 0
-        best_score = float('inf')
-        results = []
-        
-        for shift in range(1, 26):
-            decoded = self.caesar_decrypt(text, shift)
-            score = self.calculate_enhanced_score(decoded)
-            results.append((shift, score, decoded[:50]))
-            
-            if score < best_score:
-                best_score = score
-                best_shift = shift
+        # Huge inputs stop reading as soon as a prefix settles the shift
+        sampled = ""
+        if len(text) >= PROGRESSIVE_MIN_CHARS:
+            with stage('detect_progressive'):
+                result = self.engine.detect_progressive(text)
+            best_shift, best_score = result.shift, result.score
+            sampled = f"\n📏 Characters analysed: {result.chars_used:,} of {len(text):,}"
+        elif self.engine.scorer == 'enhanced' and self.all_languages_var.get():
+            # Every loaded language is scored in the same pass
+            with stage('analysis'):
+                match = self.engine.detect_language(text, self.input_counts())
+            best_shift, best_score = match.shift, match.score
+            sampled = f"\n🌐 Language: {match.name}"
+        else:
+            with stage('analysis'):
+                best_shift, best_score = self.current_analysis(text).best_quality()
         
         self.shift_var.set(best_shift)
         self.quick_decode()
@@ -316,24 +515,47 @@ class EnhancedCaesarDecoder:
         messagebox.showinfo("🧠 AI Analysis Complete", 
                            f"🎯 Intelligent guess: Shift {best_shift}\n"
                            f"🔬 AI Confidence: {confidence:.1f}%\n"
-                           f"📊 Analysis score: {best_score:.2f}")
+                           f"📊 Analysis score: {best_score:.2f}" + sampled)
+    
+    def current_analysis(self, text):
+        """Shared analysis of the input, reusing the live counts on first use"""
+        return self.engine.analyze(text, self.input_counts())
+    
+    def toggle_profiling(self):
+        """Switch the stage timing hooks on or off"""
+        PROFILER.enabled = self.profile_var.get()
+        if not PROFILER.enabled:
+            PROFILER.reset()
+    
+    def export_metrics(self):
+        """Dump the stage timings as JSON"""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        if filename:
+            try:
+                PROFILER.dump(filename)
+                messagebox.showinfo("Success", f"Metrics exported to {filename}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not export metrics: {str(e)}")
+    
+    def set_scorer(self, scorer):
+        """Switch the scorer used to rank shifts"""
+        self.engine.scorer = scorer
     
     def add_to_history(self, action, score):
         """Add entry to decryption history"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        entry = {
-            'time': timestamp,
-            'action': action,
-            'score': score,
-            'input_preview': self.input_text.get(1.0, "1.50"),
-            'output_preview': self.output_text.get(1.0, "1.50")
-        }
-        self.history.append(entry)
-        self.refresh_history()
+        self.history.append(HistoryEntry(timestamp, action, score,
+                                         self.input_text.get(1.0, "1.50"),
+                                         self.output_text.get(1.0, "1.50")))
+        self.render_new_history()
     
     def refresh_history(self):
         """Refresh history display"""
         self.history_display.delete(1.0, tk.END)
+        self.history_rendered_seq = self.history.last_seq
         
         if not self.history:
             self.history_display.insert(tk.END, "📚 No decryption history yet...\n")
@@ -342,15 +564,35 @@ class EnhancedCaesarDecoder:
         self.history_display.insert(tk.END, "📚 DECRYPTION HISTORY\n")
         self.history_display.insert(tk.END, "=" * 50 + "\n\n")
         
-        for i, entry in enumerate(reversed(self.history[-10:])):  # Show last 10
-            self.history_display.insert(tk.END, f"🕐 {entry['time']} | {entry['action']}\n")
-            self.history_display.insert(tk.END, f"   Score: {entry['score']:.2f}\n")
-            self.history_display.insert(tk.END, f"   Input: {entry['input_preview'].strip()[:40]}...\n")
-            self.history_display.insert(tk.END, f"   Output: {entry['output_preview'].strip()[:40]}...\n\n")
+        for entry in reversed(self.history.tail(HISTORY_DISPLAY_ROWS)):
+            self.history_display.insert(tk.END, self.format_history_entry(entry))
+    
+    def render_new_history(self):
+        """Insert only the entries added since the last render, dropping rows past the display limit"""
+        new_entries = self.history.since(self.history_rendered_seq)
+        if not new_entries:
+            return
+        if len(new_entries) == len(self.history) or len(new_entries) >= HISTORY_DISPLAY_ROWS:
+            self.refresh_history()
+            return
+        
+        self.history_rendered_seq = self.history.last_seq
+        for entry in new_entries:
+            self.history_display.insert("4.0", self.format_history_entry(entry))
+        
+        # Rows are five lines each below the three header lines
+        self.history_display.delete(f"{4 + HISTORY_DISPLAY_ROWS * 5}.0", tk.END)
+    
+    def format_history_entry(self, entry):
+        """Text block for one history row"""
+        return (f"🕐 {entry.time} | {entry.action}\n"
+                f"   Score: {entry.score:.2f}\n"
+                f"   Input: {entry.input_preview.strip()[:40]}...\n"
+                f"   Output: {entry.output_preview.strip()[:40]}...\n\n")
     
     def pattern_matching_analysis(self):
         """Advanced pattern matching analysis"""
-        text = self.input_text.get(1.0, tk.END).strip()
+        text = self.input_content()
         if not text:
             messagebox.showwarning("Warning", "Please enter text to analyze!")
             return
@@ -361,32 +603,28 @@ class EnhancedCaesarDecoder:
         analysis = "🔍 PATTERN MATCHING ANALYSIS\n"
         analysis += "=" * 40 + "\n\n"
         
-        # Test all shifts and find patterns
+        # Pattern matches of every shift come from the shared analysis
+        text_analysis = self.current_analysis(text)
         pattern_matches = []
         
         for shift in range(1, 26):
-            decoded = self.caesar_decrypt(text, shift)
-            decoded_upper = decoded.upper()
-            
-            # Count pattern matches
-            digram_matches = sum(1 for digram in self.common_digrams if digram in decoded_upper)
-            trigram_matches = sum(1 for trigram in self.common_trigrams if trigram in decoded_upper)
+            digram_matches, trigram_matches = text_analysis.pattern_match_counts[shift]
             
             # Calculate pattern density
             total_patterns = digram_matches + trigram_matches
-            pattern_density = total_patterns / max(1, len(decoded.split()))
+            pattern_density = total_patterns / max(1, text_analysis.word_count)
             
-            pattern_matches.append((shift, total_patterns, pattern_density, decoded))
+            pattern_matches.append((shift, total_patterns, pattern_density))
         
-        # Sort by pattern matches
-        pattern_matches.sort(key=lambda x: x[1], reverse=True)
+        # Most pattern matches first
+        pattern_matches = text_analysis.top_candidates(8, pattern_matches, largest=True)
         
         analysis += "🎯 PATTERN MATCH RANKING:\n"
         analysis += "-" * 30 + "\n"
         
-        for i, (shift, matches, density, decoded) in enumerate(pattern_matches[:8]):
+        for i, (shift, matches, density) in enumerate(pattern_matches):
             analysis += f"\n🔑 Shift {shift:2d}: {matches:2d} patterns (density: {density:.3f})\n"
-            analysis += f"   Preview: {decoded[:60]}...\n"
+            analysis += f"   Preview: {text_analysis.preview(shift, 60)}...\n"
         
         # Best candidate analysis
         best_shift = pattern_matches[0][0]
@@ -398,83 +636,27 @@ class EnhancedCaesarDecoder:
     
     def export_analysis_report(self):
         """Export comprehensive analysis report"""
-        text = self.input_text.get(1.0, tk.END).strip()
+        text = self.input_content()
         if not text:
             messagebox.showwarning("Warning", "Please enter text to analyze!")
             return
         
         filename = filedialog.asksaveasfilename(
             defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), ("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=[("Text files", "*.txt"), ("JSON files", "*.json"), ("JSON Lines files", "*.jsonl"),
+                       ("Gzipped reports", "*.gz"), ("All files", "*.*")]
         )
         
         if filename:
             try:
-                report = self.generate_comprehensive_report(text)
-                
-                if filename.endswith('.json'):
-                    with open(filename, 'w') as f:
-                        json.dump(report, f, indent=2)
-                else:
-                    with open(filename, 'w') as f:
-                        f.write(self.format_report_text(report))
+                # Streamed straight to the file, one shift at a time
+                with stage('report'):
+                    write_report(self.engine, text, filename, counts=self.input_counts())
                 
                 messagebox.showinfo("Success", f"Analysis report exported to {filename}")
             except Exception as e:
                 messagebox.showerror("Error", f"Could not export report: {str(e)}")
     
-    def generate_comprehensive_report(self, text):
-        """Generate comprehensive analysis report"""
-        report = {
-            'timestamp': datetime.now().isoformat(),
-            'input_text': text,
-            'analysis': {}
-        }
-        
-        # Analyze all shifts
-        for shift in range(1, 26):
-            decoded = self.caesar_decrypt(text, shift)
-            letter_freq, digram_freq, trigram_freq = self.get_enhanced_frequency(decoded)
-            
-            report['analysis'][f'shift_{shift}'] = {
-                'shift': shift,
-                'decoded_text': decoded,
-                'quality_score': self.calculate_enhanced_score(decoded),
-                'readability_score': self.calculate_readability(decoded),
-                'word_score': self.calculate_word_score(decoded),
-                'letter_frequency': letter_freq,
-                'top_digrams': dict(list(digram_freq.items())[:5]),
-                'top_trigrams': dict(list(trigram_freq.items())[:5])
-            }
-        
-        return report
-    
-    def format_report_text(self, report):
-        """Format report as readable text"""
-        text = f"🔐 CAESAR CIPHER ANALYSIS REPORT\n"
-        text += f"Generated: {report['timestamp']}\n"
-        text += "=" * 50 + "\n\n"
-        
-        text += f"📝 Input Text Length: {len(report['input_text'])} characters\n"
-        text += f"📝 Input Preview: {report['input_text'][:100]}...\n\n"
-        
-        # Find best candidates
-        candidates = []
-        for shift_key, data in report['analysis'].items():
-            total_score = data['quality_score'] + data['readability_score'] + data['word_score']
-            candidates.append((data['shift'], total_score, data['decoded_text']))
-        
-        candidates.sort(key=lambda x: x[1])
-        
-        text += "🏆 TOP 5 CANDIDATES:\n"
-        text += "-" * 30 + "\n"
-        
-        for i, (shift, score, decoded) in enumerate(candidates[:5]):
-            text += f"\n🔑 Rank {i+1}: Shift {shift} (Score: {score:.2f})\n"
-            text += f"   {decoded[:80]}...\n"
-        
-        return text
-    
     def load_file(self):
         """Load text from file with enhanced support"""
         filename = filedialog.askopenfilename(
@@ -483,16 +665,48 @@ class EnhancedCaesarDecoder:
         )
         if filename:
             try:
+                if os.path.getsize(filename) >= LARGE_DOCUMENT_BYTES:
+                    self.open_document(filename)
+                    self.add_to_history(f"Opened document: {filename}", 0)
+                    return
                 with open(filename, 'r', encoding='utf-8') as file:
                     content = file.read()
+                    self.close_document()
                     self.input_text.delete(1.0, tk.END)
                     self.input_text.insert(1.0, content)
                     self.add_to_history(f"Loaded file: {filename}", 0)
             except Exception as e:
                 messagebox.showerror("Error", f"Could not load file: {str(e)}")
     
+    def load_dictionary(self):
+        """Load a word list (one word per line) for word scoring"""
+        filename = filedialog.askopenfilename(
+            title="Select word list",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+        )
+        if filename:
+            try:
+                words = load_wordlist(filename)
+                self.engine.set_wordlist(words)
+                # The automaton for a large list takes a while to build, so the
+                # live statistic keeps its current words until it is ready
+                threading.Thread(target=self._build_live_words, args=(words,), name="live-words",
+                                 daemon=True).start()
+                self.add_to_history(f"Loaded word list: {filename}", 0)
+                messagebox.showinfo("Success", f"Word scoring now uses {len(words):,} words")
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not load word list: {str(e)}")
+    
+    def _build_live_words(self, words):
+        """Worker thread: build the live word matcher for a loaded list and swap it in"""
+        self.live_words = PatternMatcher(sorted(words))
+    
     def save_result(self):
         """Save decoded result to file"""
+        if self.document is not None:
+            self.save_document_result()
+            return
+        
         content = self.output_text.get(1.0, tk.END).strip()
         if not content:
             messagebox.showwarning("Warning", "No decoded text to save!")
@@ -510,8 +724,83 @@ class EnhancedCaesarDecoder:
             except Exception as e:
                 messagebox.showerror("Error", f"Could not save file: {str(e)}")
     
+    def save_document_result(self):
+        """Decode the whole open document straight from its memory map into a file"""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+        )
+        if filename:
+            try:
+                self.document.write_decoded(filename, self.shift_var.get())
+                messagebox.showinfo("Success", f"Result saved to {filename}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Could not save file: {str(e)}")
+    
+    def input_content(self):
+        """Input text to analyse: the widget contents, or the leading sample of an open document"""
+        if self.document is not None:
+            return self.document_sample
+        return self.input_text.get(1.0, tk.END).strip()
+    
+    def input_counts(self):
+        """Live counts matching input_content, or None when they cover only a document page"""
+        return None if self.document is not None else self.input_stats.snapshot()
+    
+    def open_document(self, filename):
+        """Show a large file page by page from a memory map instead of loading it into the widget"""
+        document = MappedDocument(filename)
+        self.close_document()
+        self.live_scheduler.cancel()
+        self.document = document
+        self.document_sample = document.sample_text().strip()
+        self.page_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+        self.show_document_page(0)
+    
+    def close_document(self):
+        """Leave document mode and make the input editable again"""
+        if self.document is None:
+            return
+        self.document.close()
+        self.document = None
+        self.document_sample = None
+        self.page_frame.pack_forget()
+        self.input_text.config(state='normal')
+    
+    def show_document_page(self, page):
+        """Put one page in the input widget and its decoding in the output"""
+        self.document_page = max(0, min(page, self.document.page_count - 1))
+        self.input_text.config(state='normal')
+        self.input_text.delete(1.0, tk.END)
+        self.input_text.insert(1.0, self.document.page_text(self.document_page))
+        self.input_text.config(state='disabled')
+        self.page_label.config(text=f"📄 Page {self.document_page + 1:,}/{self.document.page_count:,} "
+                                    f"of {self.document.size / 1e6:.1f} MB (read-only)")
+        self.quick_decode()
+    
+    def move_document_page(self, step):
+        if self.document is not None:
+            self.show_document_page(self.document_page + step)
+    
+    def on_document_scroll(self, event):
+        """Turn the page when scrolling past the top or bottom of the current one"""
+        if self.document is None:
+            return
+        down = getattr(event, 'num', None) == 5 or getattr(event, 'delta', 0) < 0
+        first, last = event.widget.yview()
+        if down and last >= 1.0 and self.document_page + 1 < self.document.page_count:
+            self.show_document_page(self.document_page + 1)
+            event.widget.yview_moveto(0.0)
+            return "break"
+        if not down and first <= 0.0 and self.document_page > 0:
+            self.show_document_page(self.document_page - 1)
+            event.widget.yview_moveto(1.0)
+            return "break"
+    
     def clear_all(self):
         """Clear all text fields"""
+        self.live_scheduler.cancel()
+        self.close_document()
         self.input_text.delete(1.0, tk.END)
         self.output_text.delete(1.0, tk.END)
         self.stats_display.config(state='normal')
@@ -520,16 +809,9 @@ class EnhancedCaesarDecoder:
     
     def load_random_sample(self):
         """Load random sample encrypted text"""
-        samples = [
-            ("Classic Quote", "WKH TXLFN EURZQ IRA MXPSV RYHU WKH ODCB GRJ. FDHVDU FLSKHU LV RQH RI WKH VLPSOHVW DQG PRVW ZLGHOB NQRZQ HQFUBSWLRQ WHFKQLTXHV."),
-            ("Shakespeare", "WR EH RU QRW WR EH WKDW LV WKH TXHVWLRQ ZKHWKHU WLV QREOHU LQ WKH PLQG WR VXIIHU WKH VOLQJV DQG DUURZV"),
-            ("Declaration", "ZH KROG WKHVH WUXWKV WR EH VHOI HYLGHQW WKDW DOO PHQ DUH FUHDWHG HTXDO WKDW WKHB DUH HQGRZHG EB WKHLU FUHDWRU"),
-            ("Tech Quote", "FRPSXWHUV DUH LQFUHGLEBO IDVW DFFXUDWH DQG VWXSLG KXPDQV DUH LQFUHGLEBO VORZ LQDFFXUDWH DQG EULOODQW"),
-            ("Mystery Text", "EUXWH IRUFH DWWDFNV DUH FRPPRQ LQ FUSWRJUDSKB ZKHQ BRX FDQQRW ILQG WKH NHB WUB DOO SRVVLEOH NHBV")
-        ]
-        
         import random
-        name, sample = random.choice(samples)
+        name, sample = random.choice(SAMPLE_TEXTS)
+        self.close_document()
         self.input_text.delete(1.0, tk.END)
         self.input_text.insert(1.0, sample)
         self.add_to_history(f"Loaded sample: {name}", 0)
@@ -541,14 +823,13 @@ class EnhancedCaesarDecoder:
             return
         
         filename = filedialog.asksaveasfilename(
-            defaultextension=".json",
-            filetypes=[("JSON files", "*.json"), ("Text files", "*.txt")]
+            defaultextension=".jsonl",
+            filetypes=[("JSON Lines files", "*.jsonl"), ("JSON files", "*.json"), ("Text files", "*.txt")]
         )
         if filename:
             try:
-                with open(filename, 'w') as f:
-                    json.dump(self.history, f, indent=2)
-                messagebox.showinfo("Success", f"History exported to {filename}")
+                count = self.history.export(filename)
+                messagebox.showinfo("Success", f"Exported {count} history entries to {filename}")
             except Exception as e:
                 messagebox.showerror("Error", f"Could not export history: {str(e)}")
     
@@ -562,119 +843,176 @@ class EnhancedCaesarDecoder:
     
     def quick_decode(self):
         """Quick decode with real-time stats"""
-        text = self.input_text.get(1.0, tk.END).strip()
-        if not text:
+        # A document decodes just the page on screen
+        if self.document is not None:
+            page = self.document.page_text(self.document_page)
+            self.show_live_result(self.compute_live_result(page, self.shift_var.get()))
             return
         
-        shift = self.shift_var.get()
-        decoded = self.caesar_decrypt(text, shift)
+        with stage('widget_read'):
+            text = self.input_content()
+        if not text:
+            return
         
-        self.output_text.delete(1.0, tk.END)
-        self.output_text.insert(1.0, decoded)
+        self.show_live_result(self.compute_live_result(text, self.shift_var.get(), self.input_stats.counts()))
+    
+    def compute_live_result(self, text, shift, counts=None):
+        """Decode and score for the live view; touches no widgets so it can run off the Tk thread"""
+        with stage('decrypt'):
+            decoded = self.engine.caesar_decrypt(text, shift)
+        if counts is None:
+            with stage('frequency_count'):
+                counts = self.engine.count_ngrams(text)
         
-        # Update live stats
-        self.update_live_stats(text, decoded, shift)
+        # Check for common English words
+        with stage('scoring'):
+            score = self.engine.score_counts(counts, shift)
+            live_words = self.live_words
+            word_matches = live_words.matches(decoded.upper())
+        
+        return {
+            'shift': shift,
+            'decoded': decoded,
+            'length': len(text),
+            'letters': counts[0],
+            'score': score,
+            'word_matches': word_matches,
+            'word_total': len(live_words)
+        }
+    
+    def show_live_result(self, result):
+        """Show a computed live result in the decoder tab"""
+        with stage('output_render'):
+            self.output_text.delete(1.0, tk.END)
+            self.output_text.insert(1.0, result['decoded'])
         
         # Add to history
-        self.add_to_history(f"Manual decode with shift {shift}", self.calculate_enhanced_score(decoded))
+        with stage('history'):
+            self.add_to_history(f"Manual decode with shift {result['shift']}", result['score'])
+        
+        # Update live stats
+        self.update_live_stats(result)
     
-    def update_live_stats(self, original, decoded, shift):
+    def update_live_stats(self, result):
         """Update real-time statistics"""
         self.stats_display.config(state='normal')
         self.stats_display.delete(1.0, tk.END)
         
-        stats = f"🔑 Shift: {shift} | 📝 Length: {len(original)} | "
-        stats += f"🔤 Letters: {len([c for c in original if c.isalpha()])}\n"
-        
-        score = self.calculate_enhanced_score(decoded)
-        stats += f"📊 Quality Score: {score:.2f} | "
-        
-        # Check for common English words
-        common_words = ['THE', 'AND', 'TO', 'OF', 'A', 'IN', 'FOR', 'IS', 'ON', 'THAT']
-        word_matches = sum(1 for word in common_words if word in decoded.upper())
-        stats += f"🎯 Word Matches: {word_matches}/10\n"
+        stats = f"🔑 Shift: {result['shift']} | 📝 Length: {result['length']} | "
+        stats += f"🔤 Letters: {result['letters']}\n"
+        stats += f"📊 Quality Score: {result['score']:.2f} | "
+        stats += f"🎯 Word Matches: {result['word_matches']}/{result['word_total']}\n"
+        if PROFILER.enabled:
+            stats += f"⏱️ {PROFILER.format_summary()}\n"
         
         self.stats_display.insert(1.0, stats)
         self.stats_display.config(state='disabled')
     
+    def live_snapshot(self):
+        """Read the inputs for a live update on the Tk thread"""
+        if self.document is not None:
+            return None
+        text = self.input_content()
+        if not text:
+            return None
+        return text, self.shift_var.get(), self.input_stats.snapshot()
+    
+    def track_input_edits(self):
+        """Route the input widget's Tcl command through a proxy that feeds input_stats"""
+        widget_command = str(self.input_text)
+        self._input_widget_command = widget_command + '_orig'
+        self.root.tk.call('rename', widget_command, self._input_widget_command)
+        self.root.tk.createcommand(widget_command, self._input_text_proxy)
+    
+    def _input_call(self, *args):
+        return self.root.tk.call((self._input_widget_command,) + args)
+    
+    def _input_index(self, index):
+        """Resolve an index the way insert/delete will, never past the trailing newline"""
+        if self._input_call('compare', index, '>', 'end-1c'):
+            index = 'end-1c'
+        return self._input_call('index', index)
+    
+    def _input_context(self, index, direction):
+        """Unchanged text beside index holding enough letters for the n-gram delta"""
+        span = 32
+        while True:
+            if direction < 0:
+                text = self._input_call('get', f'{index} - {span} chars', index)
+            else:
+                text = self._input_call('get', index, f'{index} + {span} chars')
+            if len(text) < span or IncrementalStats.has_context(text):
+                return text
+            span *= 4
+    
+    def _input_text_proxy(self, *args):
+        """Input widget command: forward everything, turning inserts/deletes into stats deltas"""
+        operation = args[0] if args else None
+        if operation not in ('insert', 'delete', 'replace'):
+            return self._input_call(*args)
+        if str(self._input_call('cget', '-state')) == 'disabled':
+            # Tk ignores edits of a disabled widget, e.g. in document mode, so the stats must too
+            return self._input_call(*args)
+        if operation == 'delete' and len(args) > 3:
+            # Several ranges at once, which Tk sorts and merges itself: recount the result
+            result = self._input_call(*args)
+            self.input_stats = IncrementalStats(self._input_call('get', '1.0', 'end - 1 chars'))
+            return result
+        
+        start = self._input_index(args[1])
+        if operation == 'insert':
+            end = start
+            new = ''.join(args[2::2])
+        elif operation == 'delete':
+            end = self._input_index(args[2] if len(args) > 2 else f'{start} + 1 chars')
+            new = ''
+        else:
+            end = self._input_index(args[2])
+            new = ''.join(args[3::2])
+        
+        if self._input_call('compare', end, '<', start):
+            end = start
+            if operation == 'delete':
+                return self._input_call(*args)
+        
+        old = self._input_call('get', start, end)
+        before = self._input_context(start, -1)
+        after = self._input_context(end, 1)
+        
+        result = self._input_call(*args)
+        self.input_stats.replace(before, old, new, after)
+        return result
+    
     def on_text_change(self, event):
         """Handle text changes for real-time analysis"""
         if hasattr(self, 'output_text'):
-            self.quick_decode()
+            self.live_scheduler.schedule()
     
     def deep_frequency_analysis(self):
         """Perform deep frequency analysis with visualization"""
-        text = self.input_text.get(1.0, tk.END).strip()
+        with stage('widget_read'):
+            text = self.input_content()
         if not text:
             messagebox.showwarning("Warning", "Please enter text to analyze!")
             return
         
-        # Clear previous charts
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-        
-        letter_freq, digram_freq, trigram_freq = self.get_enhanced_frequency(text)
-        
-        # Create enhanced visualization
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 10))
-        fig.patch.set_facecolor('#2b2b2b')
+        with stage('analysis'):
+            analysis = self.current_analysis(text)
+            letter_freq, digram_freq, trigram_freq = analysis.frequency()
         
-        # Letter frequency
-        letters = list(string.ascii_uppercase)
-        text_freq = [letter_freq[letter] for letter in letters]
-        english_freq = [self.english_freq[letter] for letter in letters]
+        # Charts are built on first use and only updated afterwards
+        with stage('chart_update'):
+            if self.charts is None:
+                self.charts = FrequencyCharts(self.chart_frame, self.english_freq)
+            self.charts.update(letter_freq, digram_freq, trigram_freq,
+                               [analysis.quality_scores[shift] for shift in range(1, 26)])
         
-        ax1.bar(letters, text_freq, color='#ff6b6b', alpha=0.8, label='Input Text')
-        ax1.bar(letters, english_freq, color='#4ecdc4', alpha=0.6, label='English')
-        ax1.set_title('Letter Frequency Comparison', color='white', fontsize=11)
-        ax1.legend()
-        ax1.tick_params(colors='white', labelsize=8)
-        ax1.set_facecolor('#3b3b3b')
-        
-        # Digram frequency
-        if digram_freq:
-            digrams = list(digram_freq.keys())[:8]
-            counts = list(digram_freq.values())[:8]
-            ax2.bar(digrams, counts, color='#95e1d3', alpha=0.8)
-            ax2.set_title('Most Common Digrams', color='white', fontsize=11)
-            ax2.tick_params(colors='white', labelsize=8)
-            ax2.set_facecolor('#3b3b3b')
-        
-        # Trigram frequency
-        if trigram_freq:
-            trigrams = list(trigram_freq.keys())[:6]
-            counts = list(trigram_freq.values())[:6]
-            ax3.bar(trigrams, counts, color='#f8b500', alpha=0.8)
-            ax3.set_title('Most Common Trigrams', color='white', fontsize=11)
-            ax3.tick_params(colors='white', labelsize=8)
-            ax3.set_facecolor('#3b3b3b')
-        
-        # Pattern analysis heatmap
-        pattern_data = []
-        for shift in range(1, 26):
-            decoded = self.caesar_decrypt(text, shift)
-            score = self.calculate_enhanced_score(decoded)
-            pattern_data.append(score)
-        
-        ax4.plot(range(1, 26), pattern_data, color='#00ff41', linewidth=2, marker='o', markersize=4)
-        ax4.set_title('Shift Quality Analysis', color='white', fontsize=11)
-        ax4.set_xlabel('Shift Value', color='white')
-        ax4.set_ylabel('Quality Score', color='white')
-        ax4.tick_params(colors='white', labelsize=8)
-        ax4.set_facecolor('#3b3b3b')
-        ax4.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        
-        # Embed in GUI
-        canvas = FigureCanvasTkAgg(fig, self.chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        
-        self.update_detailed_stats(text, letter_freq, digram_freq, trigram_freq)
+        with stage('detailed_stats'):
+            self.update_detailed_stats(text, analysis)
     
-    def update_detailed_stats(self, text, letter_freq, digram_freq, trigram_freq):
+    def update_detailed_stats(self, text, analysis):
         """Update detailed statistics display"""
+        letter_freq, digram_freq, trigram_freq = analysis.frequency()
         self.detailed_stats.delete(1.0, tk.END)
         
         stats = "🔬 DEEP ANALYSIS RESULTS\n"
@@ -682,8 +1020,8 @@ class EnhancedCaesarDecoder:
         
         stats += f"📊 Text Statistics:\n"
         stats += f"  • Total chars: {len(text)}\n"
-        stats += f"  • Letters: {len([c for c in text if c.isalpha()])}\n"
-        stats += f"  • Words: {len(text.split())}\n"
+        stats += f"  • Letters: {analysis.counts[0]}\n"
+        stats += f"  • Words: {analysis.word_count}\n"
         stats += f"  • Sentences: {len(re.split(r'[.!?]+', text))}\n\n"
         
         stats += "🔤 Top Letter Frequencies:\n"
@@ -705,7 +1043,7 @@ class EnhancedCaesarDecoder:
     
     def analyze_patterns(self):
         """AI-powered pattern analysis"""
-        text = self.input_text.get(1.0, tk.END).strip()
+        text = self.input_content()
         if not text:
             messagebox.showwarning("Warning", "Please enter text to analyze!")
             return
@@ -714,94 +1052,160 @@ class EnhancedCaesarDecoder:
         self.pattern_results.insert(tk.END, "🧠 AI PATTERN ANALYSIS\n")
         self.pattern_results.insert(tk.END, "=" * 50 + "\n\n")
         
-        # Analyze all possible shifts
-        candidates = []
-        for shift in range(1, 26):
-            decoded = self.caesar_decrypt(text, shift)
-            score = self.calculate_enhanced_score(decoded)
-            
-            # Additional pattern checks
-            readability_score = self.calculate_readability(decoded)
-            word_score = self.calculate_word_score(decoded)
-            
-            combined_score = score + readability_score + word_score
-            candidates.append((shift, combined_score, decoded))
-        
-        # Sort by best score
-        candidates.sort(key=lambda x: x[1])
+        # Rank all possible shifts by score, decoding only the previews shown
+        analysis = self.current_analysis(text)
         
         self.pattern_results.insert(tk.END, "🎯 TOP CANDIDATES:\n")
         self.pattern_results.insert(tk.END, "-" * 30 + "\n")
         
-        for i, (shift, score, decoded) in enumerate(candidates[:5]):
+        for i, (shift, score) in enumerate(analysis.top_candidates(5)):
             confidence = max(0, 100 - score)
             self.pattern_results.insert(tk.END, f"\n🔑 Rank {i+1}: Shift {shift} (Confidence: {confidence:.1f}%)\n")
-            self.pattern_results.insert(tk.END, f"Preview: {decoded[:80]}...\n")
-    
-    def calculate_readability(self, text):
-        """Calculate readability score"""
-        # Simple readability based on word patterns
-        words = text.split()
-        if not words:
-            return 100
-        
-        score = 0
-        for word in words:
-            if len(word) < 2:
-                score += 5
-            elif len(word) > 15:
-                score += 3
-            else:
-                score -= 1
-        
-        return max(0, score)
-    
-    def calculate_word_score(self, text):
-        """Calculate word pattern score"""
-        common_words = ['THE', 'AND', 'TO', 'OF', 'A', 'IN', 'FOR', 'IS', 'ON', 'THAT', 'WITH', 'IT', 'BE', 'AS', 'YOU', 'HAVE', 'ARE', 'AT', 'THIS', 'OR']
-        words = text.upper().split()
-        
-        if not words:
-            return 100
-        
-        matches = sum(1 for word in words if word in common_words)
-        return max(0, 50 - (matches * 2))
+            self.pattern_results.insert(tk.END, f"Preview: {analysis.preview(shift, 80)}...\n")
     
     def intelligent_guess(self):
         """Make intelligent guess based on all analysis"""
-        text = self.input_text.get(1.0, tk.END).strip()
+        text = self.input_content()
         if not text:
             messagebox.showwarning("Warning", "Please enter text to analyze!")
             return
         
-        # Run comprehensive analysis
-        best_shift = 0
-        best_score = float('inf')
-        
-        for shift in range(1, 26):
-            decoded = self.caesar_decrypt(text, shift)
-            
-            # Combined scoring
-            freq_score = self.calculate_enhanced_score(decoded)
-            read_score = self.calculate_readability(decoded)
-            word_score = self.calculate_word_score(decoded)
-            
-            total_score = freq_score + read_score + word_score
-            
-            if total_score < best_score:
-                best_score = total_score
-                best_shift = shift
+        # Run comprehensive analysis, on a decisive prefix for huge inputs
+        if len(text) >= PROGRESSIVE_MIN_CHARS:
+            best_shift = self.engine.detect_progressive(text, rank=self.engine.intelligent_guess).shift
+        else:
+            best_shift, best_score = self.current_analysis(text).best_combined()
         
         self.shift_var.set(best_shift)
         self.quick_decode()
 
 
-def main():
+# Commands backed by process pools or asyncio import their module only when
+# they run, so starting the GUI never loads multiprocessing or asyncio
+def _run_crack(args):
+    from cipher_batch import run_crack
+    return run_crack(args)
+
+
+def _run_detect(args):
+    from cipher_histogram import run_detect
+    return run_detect(args)
+
+
+def _run_serve(args):
+    from cipher_service import run_serve
+    return run_serve(args)
+
+
+def positive_int(value):
+    """argparse type for counts and sizes that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def build_parser(command=None):
+    """Command-line interface; running without a command starts the GUI
+    
+    Options of the serve command come from cipher_service, which is only
+    imported when command is 'serve'.
+    """
+    parser = argparse.ArgumentParser(prog='ceasecipher', description="Advanced Caesar Cipher Decoder")
+    commands = parser.add_subparsers(dest='command')
+    
+    decode = commands.add_parser('decode', help="stream-decode a file or stdin with constant memory")
+    decode.add_argument('input', nargs='?', default='-', help="input file ('-' for stdin)")
+    decode.add_argument('-o', '--output', default='-', help="output file ('-' for stdout)")
+    shift_group = decode.add_mutually_exclusive_group(required=True)
+    shift_group.add_argument('--shift', type=int, help="decode with this shift")
+    shift_group.add_argument('--auto', action='store_true', help="detect the shift from the start of the input")
+    decode.add_argument('--chunk-size', type=positive_int, default=DEFAULT_CHUNK_SIZE, help="characters read per chunk")
+    decode.add_argument('--encoding', default='utf-8', help="text encoding of input and output")
+    decode.add_argument('--scorer', choices=SCORERS, default='enhanced', help="how --auto ranks shifts")
+    decode.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE,
+                        help="posterior probability at which --auto stops sampling")
+    decode.set_defaults(handler=run_decode)
+    
+    crack = commands.add_parser('crack', help="auto-detect shifts for a directory or glob of files")
+    crack.add_argument('target', help="directory to walk or glob pattern (quote it)")
+    crack.add_argument('--pattern', default='*', help="file name pattern when walking a directory")
+    crack.add_argument('-o', '--output', default='-', help="JSONL results file ('-' for stdout)")
+    crack.add_argument('-j', '--workers', type=positive_int, default=None, help="worker processes (default: CPU count)")
+    crack.add_argument('--chunksize', type=positive_int, default=16, help="files handed to a worker at a time")
+    crack.add_argument('--scorer', choices=SCORERS, default='enhanced', help="how shifts are ranked")
+    crack.add_argument('--wordlist', help="word list file (one word per line) for word scoring")
+    crack.add_argument('--languages', nargs='+', metavar='CODE',
+                       help="pick shift and language together from these profiles (e.g. en fr de)")
+    crack.set_defaults(handler=_run_crack)
+    
+    detect = commands.add_parser('detect', help="detect the shift of one huge file from its whole-file histogram")
+    detect.add_argument('input', help="ciphertext file")
+    detect.add_argument('-j', '--workers', type=positive_int, default=None, help="worker processes (default: CPU count)")
+    detect.add_argument('--range-mb', type=positive_int, default=DEFAULT_RANGE_BYTES >> 20,
+                        help="megabytes of the file counted per worker task")
+    detect.set_defaults(handler=_run_detect)
+    
+    report = commands.add_parser('report', help="stream a full 25-shift analysis report to a file")
+    report.add_argument('input', help="ciphertext file")
+    report.add_argument('-o', '--output', default='-',
+                        help="report file; .json, .jsonl or text by extension, gzipped if it ends in .gz")
+    report.add_argument('--format', choices=REPORT_FORMATS, help="override the format implied by the extension")
+    report.add_argument('--decoded', choices=DECODED_MODES, default='full',
+                        help="include full decoded texts or only previews")
+    report.add_argument('--preview-length', type=int, default=DEFAULT_PREVIEW_LENGTH, help="characters per preview")
+    report.add_argument('--chunk-size', type=positive_int, default=DEFAULT_REPORT_CHUNK_SIZE, help="characters decoded per write")
+    report.add_argument('--encoding', default='utf-8', help="text encoding of the input")
+    report.add_argument('--scorer', choices=SCORERS, default='enhanced', help="how shifts are ranked")
+    report.set_defaults(handler=run_report)
+    
+    serve = commands.add_parser('serve', help="run the local HTTP decode service")
+    if command == 'serve':
+        from cipher_service import add_serve_arguments
+        add_serve_arguments(serve)
+    serve.set_defaults(handler=_run_serve)
+    
+    return parser
+
+
+def run_gui():
+    """Start the Tk application"""
+    _load_tkinter()
     root = tk.Tk()
     app = EnhancedCaesarDecoder(root)
     root.mainloop()
 
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # The top-level parser has no options besides -h, so the first
+    # non-option argument is the command
+    command = next((arg for arg in argv if not arg.startswith('-')), None)
+    parser = build_parser(command)
+    args = parser.parse_args(argv)
+    if args.command is None:
+        run_gui()
+        return 0
+    if getattr(args, 'encoding', None):
+        try:
+            codecs.lookup(args.encoding)
+        except LookupError as e:
+            parser.error(f"{args.command}: {e}")
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); stop quietly, and keep the
+        # interpreter's final flush of stdout from raising again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except OSError as e:
+        parser.error(f"{args.command}: {e}")
+    except UnicodeEncodeError as e:
+        parser.error(f"{args.command}: output cannot be written as {args.encoding} ({e})")
+    except UnicodeError as e:
+        parser.error(f"{args.command}: {args.input} is not valid {args.encoding} text ({e})")
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
         
     
\ No newline at end of file
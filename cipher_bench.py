@@ -0,0 +1,217 @@
+"""Benchmarks for the decode and scoring hot paths
+
+Runs each case headlessly over sample and synthetic ciphertext of several
+sizes and reports ops/s, MB/s, latency percentiles and peak memory.
+Results can be saved as a JSON baseline and compared on a later run:
+
+    python cipher_bench.py --save baseline.json
+    python cipher_bench.py --compare baseline.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from cipher_core import ENGLISH_FREQ, SAMPLE_TEXTS, CaesarEngine, caesar_decrypt, caesar_encrypt
+from cipher_messages import best_shifts
+from cipher_profiling import percentile
+
+SIZES = {
+    '100B': 100,
+    '1KB': 1000,
+    '10KB': 10 ** 4,
+    '100KB': 10 ** 5,
+    '1MB': 10 ** 6,
+    '10MB': 10 ** 7,
+    '100MB': 10 ** 8
+}
+
+DEFAULT_SIZES = ('100B', '1KB', '10KB', '100KB', '1MB')
+
+CORPORA = ('sample', 'synthetic')
+
+# Shift the synthetic corpus is encrypted with
+SYNTHETIC_SHIFT = 7
+
+# Length of the short messages a corpus is cut into for the batch case
+MESSAGE_CHARS = 160
+
+
+def sample_corpus(size):
+    """The built-in sample texts, repeated to size characters"""
+    sample = ' '.join(text for name, text in SAMPLE_TEXTS) + ' '
+    return (sample * (size // len(sample) + 1))[:size]
+
+
+def synthetic_corpus(size, seed=0):
+    """English-frequency random words, encrypted, tiled from one 64 KB block"""
+    rng = random.Random(seed)
+    letters = list(ENGLISH_FREQ)
+    weights = list(ENGLISH_FREQ.values())
+    words = []
+    length = 0
+    while length < min(size, 1 << 16):
+        word = ''.join(rng.choices(letters, weights, k=rng.randint(1, 9)))
+        words.append(word)
+        length += len(word) + 1
+    block = caesar_encrypt(' '.join(words) + ' ', SYNTHETIC_SHIFT)
+    return (block * (size // len(block) + 1))[:size]
+
+
+def build_corpus(name, size):
+    return sample_corpus(size) if name == 'sample' else synthetic_corpus(size)
+
+
+def split_messages(text, length=MESSAGE_CHARS):
+    """text cut into messages of length characters"""
+    return [text[i:i + length] for i in range(0, len(text), length)]
+
+
+# Every case make_cases can build; quadgram_score_shifts needs the quadgram model
+CASES = ('caesar_decrypt', 'get_enhanced_frequency', 'calculate_enhanced_score', 'score_shifts',
+         'intelligent_guess', 'detect_progressive', 'best_shifts_messages', 'quadgram_score_shifts')
+
+
+def make_cases(engine, quadgram_engine=None):
+    """Benchmark name -> function of the ciphertext"""
+    cases = {
+        'caesar_decrypt': lambda text: caesar_decrypt(text, 3),
+        'get_enhanced_frequency': engine.get_enhanced_frequency,
+        'calculate_enhanced_score': engine.calculate_enhanced_score,
+        'score_shifts': engine.score_shifts,
+        'intelligent_guess': engine.intelligent_guess,
+        'detect_progressive': engine.detect_progressive,
+        'best_shifts_messages': lambda text: best_shifts(split_messages(text))
+    }
+    if quadgram_engine is not None:
+        cases['quadgram_score_shifts'] = quadgram_engine.score_shifts
+    return cases
+
+
+def measure(func, text, min_runs=3, max_runs=1000, min_seconds=0.5):
+    """Time func(text) repeatedly, then once more under tracemalloc for peak memory"""
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < max_runs and (len(latencies) < min_runs or time.perf_counter() - start < min_seconds):
+        t0 = time.perf_counter()
+        func(text)
+        latencies.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        func(text)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    mean = sum(latencies) / len(latencies)
+    megabytes = len(text.encode('utf-8')) / 1e6
+    return {
+        'runs': len(latencies),
+        'mean_s': mean,
+        'p50_s': percentile(latencies, 0.50),
+        'p90_s': percentile(latencies, 0.90),
+        'p99_s': percentile(latencies, 0.99),
+        'ops_per_s': 1 / mean if mean else float('inf'),
+        'mb_per_s': megabytes / mean if mean else float('inf'),
+        'peak_bytes': peak
+    }
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, corpora=CORPORA, cases=None, min_seconds=0.5, quadgrams=True, log=None):
+    """Run every case over every corpus and size; returns a baseline document"""
+    quadgram_engine = None
+    if quadgrams:
+        try:
+            quadgram_engine = CaesarEngine('quadgram')
+            quadgram_engine.score_shifts('WARM UP THE MODEL')
+        except (OSError, ValueError):
+            quadgram_engine = None
+    unknown = sorted(set(cases or ()) - set(CASES))
+    if unknown:
+        raise ValueError(f"Unknown benchmark cases {unknown}, expected some of {CASES}")
+    all_cases = make_cases(CaesarEngine(), quadgram_engine)
+    selected = [name for name in all_cases if not cases or name in cases]
+
+    results = []
+    for corpus in corpora:
+        for size_name in sizes:
+            text = build_corpus(corpus, SIZES[size_name])
+            for name in selected:
+                result = measure(all_cases[name], text, min_seconds=min_seconds)
+                result.update({'case': name, 'corpus': corpus, 'size': size_name})
+                results.append(result)
+                if log:
+                    log(format_result(result))
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results
+    }
+
+
+def result_key(result):
+    return f"{result['case']}/{result['corpus']}/{result['size']}"
+
+
+def format_result(result):
+    return (f"{result_key(result):<45} {result['ops_per_s']:>11.1f} ops/s {result['mb_per_s']:>9.2f} MB/s "
+            f"p50 {result['p50_s'] * 1e3:>9.3f} ms  p99 {result['p99_s'] * 1e3:>9.3f} ms  "
+            f"peak {result['peak_bytes'] / 1024:>9.1f} KB")
+
+
+def compare(baseline, current, tolerance=0.10):
+    """(key, baseline p50, current p50, ratio, regressed) for cases present in both runs"""
+    previous = {result_key(result): result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        key = result_key(result)
+        if key in previous:
+            before, after = previous[key]['p50_s'], result['p50_s']
+            ratio = after / before if before else float('inf')
+            rows.append((key, before, after, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the decode and scoring hot paths")
+    parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(DEFAULT_SIZES))
+    parser.add_argument('--corpora', nargs='+', choices=CORPORA, default=list(CORPORA))
+    parser.add_argument('--cases', nargs='+', choices=CASES, metavar='CASE',
+                        help=f"only run these cases ({', '.join(CASES)})")
+    parser.add_argument('--min-seconds', type=float, default=0.5, help="minimum timing per case")
+    parser.add_argument('--no-quadgrams', action='store_true', help="skip the quadgram scorer")
+    parser.add_argument('--save', metavar='FILE', help="write results as a JSON baseline")
+    parser.add_argument('--compare', metavar='FILE', help="compare p50 latency against a saved baseline")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="slowdown ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.sizes, args.corpora, args.cases, args.min_seconds,
+                             not args.no_quadgrams, log=print)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = 0
+        print(f"\nCompared with {args.compare} ({baseline['timestamp']}):")
+        for key, before, after, ratio, regressed in compare(baseline, current, args.tolerance):
+            regressions += regressed
+            print(f"{key:<45} {before * 1e3:>9.3f} ms -> {after * 1e3:>9.3f} ms  x{ratio:.2f}"
+                  + ("  REGRESSION" if regressed else ""))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,945 @@
+"""GUI-free Caesar cipher engine: decryption, frequency analysis, scoring and reports"""
+import hashlib
+import heapq
+import itertools
+import math
+import string
+import sys
+from collections import Counter, OrderedDict, namedtuple
+
+
+def _build_shift_tables():
+    """Build str and bytes translation tables for every shift (encrypt direction)"""
+    upper, lower = string.ascii_uppercase, string.ascii_lowercase
+    str_tables, bytes_tables = [], []
+    for shift in range(26):
+        source = upper + lower
+        target = upper[shift:] + upper[:shift] + lower[shift:] + lower[:shift]
+        str_tables.append(str.maketrans(source, target))
+        bytes_tables.append(bytes.maketrans(source.encode('ascii'), target.encode('ascii')))
+    return str_tables, bytes_tables
+
+
+# Built once at import and shared by every decode/encode call
+SHIFT_TABLES, SHIFT_BYTES_TABLES = _build_shift_tables()
+
+# Enhanced English letter frequencies
+ENGLISH_FREQ = {
+    'A': 8.12, 'B': 1.49, 'C': 2.78, 'D': 4.25, 'E': 12.02, 'F': 2.23,
+    'G': 2.02, 'H': 6.09, 'I': 6.97, 'J': 0.15, 'K': 0.77, 'L': 4.03,
+    'M': 2.41, 'N': 6.75, 'O': 7.51, 'P': 1.93, 'Q': 0.10, 'R': 5.99,
+    'S': 6.33, 'T': 9.06, 'U': 2.76, 'V': 0.98, 'W': 2.36, 'X': 0.15,
+    'Y': 1.97, 'Z': 0.07
+}
+
+# Common English digrams and trigrams
+COMMON_DIGRAMS = ['TH', 'HE', 'IN', 'ER', 'AN', 'ED', 'ND', 'TO', 'EN', 'TI']
+COMMON_TRIGRAMS = ['THE', 'AND', 'ING', 'HER', 'HAT', 'HIS', 'THA', 'ERE', 'FOR', 'ENT']
+
+# Common English words used by the word score
+COMMON_WORDS = ['THE', 'AND', 'TO', 'OF', 'A', 'IN', 'FOR', 'IS', 'ON', 'THAT', 'WITH', 'IT', 'BE', 'AS', 'YOU', 'HAVE', 'ARE', 'AT', 'THIS', 'OR']
+
+# Built-in sample ciphertexts (all shift 3)
+SAMPLE_TEXTS = [
+    ("Classic Quote", "WKH TXLFN EURZQ IRA MXPSV RYHU WKH ODCB GRJ. FDHVDU FLSKHU LV RQH RI WKH VLPSOHVW DQG PRVW ZLGHOB NQRZQ HQFUBSWLRQ WHFKQLTXHV."),
+    ("Shakespeare", "WR EH RU QRW WR EH WKDW LV WKH TXHVWLRQ ZKHWKHU WLV QREOHU LQ WKH PLQG WR VXIIHU WKH VOLQJV DQG DUURZV"),
+    ("Declaration", "ZH KROG WKHVH WUXWKV WR EH VHOI HYLGHQW WKDW DOO PHQ DUH FUHDWHG HTXDO WKDW WKHB DUH HQGRZHG EB WKHLU FUHDWRU"),
+    ("Tech Quote", "FRPSXWHUV DUH LQFUHGLEBO IDVW DFFXUDWH DQG VWXSLG KXPDQV DUH LQFUHGLEBO VORZ LQDFFXUDWH DQG EULOODQW"),
+    ("Mystery Text", "EUXWH IRUFH DWWDFNV DUH FRPPRQ LQ FUSWRJUDSKB ZKHQ BRX FDQQRW ILQG WKH NHB WUB DOO SRVVLEOH NHBV")
+]
+
+# Scorers a CaesarEngine can rank shifts with
+SCORERS = ('enhanced', 'quadgram')
+
+# Default posterior probability the progressive detector must reach
+DEFAULT_CONFIDENCE = 0.999
+
+# Outcome of progressive detection: how sure it is and how much text it read
+DetectionResult = namedtuple('DetectionResult', 'shift score confidence chars_used letters_used')
+
+
+def caesar_encrypt(text, shift):
+    """Caesar-encrypt str or bytes, preserving case and non-letters"""
+    shift %= 26
+    if isinstance(text, str):
+        return text.translate(SHIFT_TABLES[shift])
+    if isinstance(text, memoryview):
+        text = text.tobytes()
+    return text.translate(SHIFT_BYTES_TABLES[shift])
+
+
+def caesar_decrypt(text, shift):
+    """Caesar-decrypt str or bytes, preserving case and non-letters"""
+    return caesar_encrypt(text, -shift)
+
+
+# numpy is optional and only imported the first time a table is counted
+_NUMPY = []
+
+
+def optional_numpy():
+    """The numpy module, or None when it is not installed"""
+    if not _NUMPY:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _NUMPY.append(numpy)
+    return _NUMPY[0]
+
+
+# Deletes every ASCII non-letter in one str.translate call
+_NON_LETTERS = {i: None for i in range(128) if not chr(i).isalpha()}
+
+# bytes.translate arguments that upper-case ASCII letters and delete every other byte
+_UPPER_BYTES = bytes.maketrans(string.ascii_lowercase.encode('ascii'), string.ascii_uppercase.encode('ascii'))
+_NON_LETTER_BYTES = bytes(b for b in range(256) if not (65 <= b <= 90 or 97 <= b <= 122))
+
+_LETTER_CODES = string.ascii_uppercase.encode('ascii')
+
+# Letters whose n-gram indexes numpy builds at once, bounding the temporaries
+COUNT_BLOCK_LETTERS = 1 << 20
+
+
+def ascii_letters(data):
+    """Uppercase ASCII letters of a bytes-like buffer in order; every other byte, non-ASCII included, dropped"""
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return data.translate(_UPPER_BYTES, _NON_LETTER_BYTES)
+
+
+def letter_sequence(text):
+    """Uppercase letters of text in order, everything else dropped
+
+    Pure-ASCII bytes-like input stays bytes and is filtered with one
+    bytes.translate; other bytes are decoded as UTF-8 and take the str path.
+    """
+    if not isinstance(text, str):
+        if isinstance(text, memoryview):
+            text = text.tobytes()
+        if text.isascii():
+            return ascii_letters(text)
+        text = text.decode('utf-8', 'surrogateescape')
+    if text.isascii():
+        return text.translate(_NON_LETTERS).upper()
+    return ''.join([c.upper() for c in text if c.isalpha()])
+
+
+def letter_byte_tables(letters):
+    """(letter counts, digram table, trigram table) of uppercase ASCII letter bytes
+
+    With numpy all three come from one trigram table, counted with a
+    bincount per COUNT_BLOCK_LETTERS block: every digram but the last starts
+    a trigram, and every letter but the last starts a digram. The tables
+    are numpy arrays then, lists otherwise.
+    """
+    np = optional_numpy()
+    if np is None:
+        text = letters.decode('ascii')
+        return [letters.count(code) for code in _LETTER_CODES], ngram_table(text, 2), ngram_table(text, 3)
+
+    size = len(letters)
+    trigram_table = np.zeros(26 ** 3, dtype=np.int64)
+    for start in range(0, size - 2, COUNT_BLOCK_LETTERS):
+        # Each block also reads the two letters that end its last trigram
+        count = min(COUNT_BLOCK_LETTERS, size - 2 - start) + 2
+        codes = np.frombuffer(letters, dtype=np.uint8, count=count, offset=start).astype(np.int32) - 65
+        trigram_table += np.bincount((codes[:-2] * 26 + codes[1:-1]) * 26 + codes[2:], minlength=26 ** 3)
+    digram_table = trigram_table.reshape(26 ** 2, 26).sum(axis=1)
+    last = [code - 65 for code in letters[-2:]]
+    if len(last) == 2:
+        digram_table[last[0] * 26 + last[1]] += 1
+    letter_counts = digram_table.reshape(26, 26).sum(axis=1)
+    if last:
+        letter_counts[last[-1]] += 1
+    return letter_counts, digram_table, trigram_table
+
+
+def letter_tables(letters_only):
+    """(letter counts, digram table, trigram table) of a letter_sequence result
+
+    ASCII letters, in bytes or str, are counted by letter_byte_tables;
+    n-grams containing a non-ASCII letter are not counted.
+    """
+    if isinstance(letters_only, str) and letters_only.isascii():
+        letters_only = letters_only.encode('ascii')
+    if not isinstance(letters_only, str):
+        return letter_byte_tables(letters_only)
+    letter_counts = [letters_only.count(letter) for letter in string.ascii_uppercase]
+    return letter_counts, ngram_table(letters_only, 2), ngram_table(letters_only, 3)
+
+
+def add_tables(a, b):
+    """Sum of two count tables of the same size, each a list or numpy array"""
+    if isinstance(a, list) and isinstance(b, list):
+        return [x + y for x, y in zip(a, b)]
+    return a + b
+
+
+def as_list(table):
+    """A count table as a list of Python ints; lists are returned as they are"""
+    return table if isinstance(table, list) else table.tolist()
+
+
+def ngram_index(gram):
+    """Index of an uppercase A-Z n-gram in a flat 26**n table, or None"""
+    index = 0
+    for c in gram:
+        code = ord(c) - 65
+        if not 0 <= code < 26:
+            return None
+        index = index * 26 + code
+    return index
+
+
+def ngram_string(index, n):
+    """Inverse of ngram_index"""
+    chars = []
+    for _ in range(n):
+        index, code = divmod(index, 26)
+        chars.append(chr(code + 65))
+    return ''.join(reversed(chars))
+
+
+def ngram_table(letters, n):
+    """Flat list of 26**n counts for the n-grams of an uppercase letter sequence
+
+    n-grams containing a non-ASCII letter are not counted.
+    """
+    size = 26 ** n
+    if len(letters) < n:
+        return [0] * size
+
+    np = optional_numpy()
+    if np is not None:
+        table = np.zeros(size, dtype=np.int64)
+        for start in range(0, len(letters) - n + 1, COUNT_BLOCK_LETTERS):
+            block = letters[start:start + COUNT_BLOCK_LETTERS + n - 1]
+            codes = np.frombuffer(block.encode('ascii', 'replace'), dtype=np.uint8).astype(np.int64) - 65
+            valid = (codes >= 0) & (codes < 26)
+            span = len(codes) - n + 1
+            index = codes[:span].copy()
+            ok = valid[:span].copy()
+            for k in range(1, n):
+                index = index * 26 + codes[k:span + k]
+                ok &= valid[k:span + k]
+            table += np.bincount(index[ok], minlength=size)
+        return table.tolist()
+
+    table = [0] * size
+    for gram, count in Counter(letters[i:i+n] for i in range(len(letters) - n + 1)).items():
+        index = ngram_index(gram)
+        if index is not None:
+            table[index] = count
+    return table
+
+
+def shift_key(word):
+    """(Caesar-invariant key, offset) of an uppercase word
+
+    The key is the word rotated so its first A-Z letter becomes 'A' and the
+    offset is that letter's position; two words are shifts of each other
+    exactly when their keys match, by the difference of their offsets.
+    Words without A-Z letters are their own key, with offset None.
+    """
+    for c in word:
+        code = ord(c) - 65
+        if 0 <= code < 26:
+            return caesar_decrypt(word, code), code
+    return word, None
+
+
+def top_ngrams(table, n, limit=10):
+    """Most common (n-gram, count) pairs of a flat table, ties in table order
+
+    Only the n-grams that occur are searched: numpy tables are narrowed
+    with flatnonzero and a partition, lists with itertools.compress.
+    """
+    if isinstance(table, list):
+        occurring = itertools.compress(range(len(table)), table)
+        best = heapq.nlargest(limit, occurring, key=table.__getitem__)
+        return [(ngram_string(index, n), table[index]) for index in best if table[index] > 0]
+
+    np = optional_numpy()
+    occurring = np.flatnonzero(table)
+    counts = table[occurring]
+    if len(counts) > limit:
+        # Everything below the limit-th largest count is out; ties with it stay for the stable sort
+        keep = counts >= np.partition(counts, len(counts) - limit)[len(counts) - limit]
+        occurring, counts = occurring[keep], counts[keep]
+    best = np.argsort(-counts, kind='stable')[:limit]
+    return [(ngram_string(index, n), count) for index, count in zip(occurring[best].tolist(), counts[best].tolist())]
+
+
+class CaesarEngine:
+    """Headless analysis engine wrapped by the Tk decoder and usable on its own"""
+
+    def __init__(self, scorer='enhanced', analysis_cache=None):
+        if scorer not in SCORERS:
+            raise ValueError(f"Unknown scorer {scorer!r}, expected one of {SCORERS}")
+        self.scorer = scorer
+        self.analysis_cache = analysis_cache if analysis_cache is not None else AnalysisCache()
+        self.english_freq = dict(ENGLISH_FREQ)
+        self.common_digrams = list(COMMON_DIGRAMS)
+        self.common_trigrams = list(COMMON_TRIGRAMS)
+        self.common_words = frozenset(COMMON_WORDS)
+        self._word_index = None
+        # shifted_digrams/shifted_trigrams as numpy index arrays, built on first use
+        self._shifted_arrays = None
+        # LanguageScorers by tuple of language codes, built on first use
+        self._language_scorers = {}
+        # cipher_messages.MessageScorer of this engine, built on first use
+        self._message_scorer = None
+
+        # Common patterns as they look in ciphertext encrypted with each shift,
+        # so candidates can be scored without decrypting them
+        self.shifted_digrams = [[ngram_index(caesar_encrypt(d, s)) for d in self.common_digrams] for s in range(26)]
+        self.shifted_trigrams = [[ngram_index(caesar_encrypt(t, s)) for t in self.common_trigrams] for s in range(26)]
+
+    def caesar_decrypt(self, text, shift):
+        """Enhanced Caesar decryption with better handling"""
+        return caesar_decrypt(text, shift)
+
+    def count_ngrams(self, text):
+        """Count letters and fill the flat digram/trigram tables of a text
+
+        text may also be bytes, bytearray or memoryview, e.g. straight from
+        a file; ASCII letters, in bytes or str, are counted a byte at a time.
+        The tables of ASCII text are then numpy arrays when numpy is
+        installed, and lists otherwise; callers that index them in Python
+        convert just what they read (as_list, pattern_counts).
+        """
+        letters_only = letter_sequence(text)
+        return (len(letters_only),) + tuple(letter_tables(letters_only))
+
+    def shift_frequency(self, counts, shift):
+        """Frequencies of the text decoded with shift, derived from ciphertext counts"""
+        total_letters, letter_counts, digram_table, trigram_table = counts
+        if not total_letters:
+            return {}, {}, {}
+        letter_counts = as_list(letter_counts)
+    
+        # Decoding rotates the histogram: plaintext letter i was ciphertext letter i + shift
+        letter_freq = {letter: (letter_counts[(i + shift) % 26] / total_letters) * 100
+                      for i, letter in enumerate(string.ascii_uppercase)}
+        digram_freq = {caesar_decrypt(digram, shift): count
+                      for digram, count in top_ngrams(digram_table, 2)}
+        trigram_freq = {caesar_decrypt(trigram, shift): count
+                       for trigram, count in top_ngrams(trigram_table, 3)}
+    
+        return letter_freq, digram_freq, trigram_freq
+
+    def get_enhanced_frequency(self, text):
+        """Enhanced frequency analysis with additional metrics"""
+        return self.shift_frequency(self.count_ngrams(text), 0)
+
+    def score_counts(self, counts, shift):
+        """Score the text decoded with shift straight from ciphertext counts"""
+        total_letters, letter_counts, digram_table, trigram_table = counts
+        letter_counts = as_list(letter_counts)
+
+        # Chi-squared for letters
+        chi_squared = 0
+        for i, letter in enumerate(string.ascii_uppercase):
+            expected = self.english_freq[letter]
+            observed = (letter_counts[(i + shift) % 26] / total_letters) * 100 if total_letters else 0
+            if expected > 0:
+                chi_squared += ((observed - expected) ** 2) / expected
+
+        # Bonus for common English patterns, read from the tables at their encrypted index
+        digram_counts, trigram_counts = self.pattern_counts(counts, shift)
+        pattern_score = sum(digram_counts) * 2 + sum(trigram_counts) * 3
+
+        # Combined score (lower is better)
+        return chi_squared - pattern_score
+
+    def pattern_counts(self, counts, shift):
+        """Counts of each common digram and trigram in the text decoded with shift, as lists of ints
+
+        Tables are lists or numpy arrays, as count_ngrams returns them; only
+        these entries are read, so numpy tables are never converted whole.
+        """
+        total_letters, letter_counts, digram_table, trigram_table = counts
+        shift = shift % 26
+        if isinstance(digram_table, list):
+            return ([digram_table[index] for index in self.shifted_digrams[shift]],
+                    [trigram_table[index] for index in self.shifted_trigrams[shift]])
+
+        if self._shifted_arrays is None:
+            np = optional_numpy()
+            self._shifted_arrays = ([np.array(row, dtype=np.intp) for row in self.shifted_digrams],
+                                    [np.array(row, dtype=np.intp) for row in self.shifted_trigrams])
+        digram_indexes, trigram_indexes = self._shifted_arrays
+        return digram_table[digram_indexes[shift]].tolist(), trigram_table[trigram_indexes[shift]].tolist()
+
+    def calculate_enhanced_score(self, text):
+        """Enhanced scoring system"""
+        return self.score_counts(self.count_ngrams(text), 0)
+
+    def score_shifts(self, text, counts=None):
+        """Score every shift from one count of the ciphertext with the selected scorer"""
+        if self.scorer == 'quadgram':
+            from cipher_quadgrams import default_model
+            if not isinstance(text, str):
+                text = bytes(text).decode('utf-8', 'surrogateescape')
+            return default_model().score_shifts(text)
+        if counts is None:
+            counts = self.count_ngrams(text)
+        return [(shift, self.score_counts(counts, shift)) for shift in range(1, 26)]
+
+    def detect_language(self, text, counts=None, languages=None):
+        """Best cipher_languages.LanguageMatch of text over languages (default: every profile)"""
+        key = tuple(languages) if languages else None
+        scorer = self._language_scorers.get(key)
+        if scorer is None:
+            from cipher_languages import LanguageScorer, load_languages
+            scorer = self._language_scorers[key] = LanguageScorer(load_languages(languages))
+        if counts is None:
+            counts = self.count_ngrams(text)
+        return scorer.best(counts)
+
+    def message_scorer(self):
+        """cipher_messages.MessageScorer of this engine's enhanced score, built once (needs numpy)"""
+        if self._message_scorer is None:
+            from cipher_messages import MessageScorer
+            self._message_scorer = MessageScorer(self)
+        return self._message_scorer
+
+    def calculate_readability(self, text):
+        """Calculate readability score"""
+        # Simple readability based on word patterns
+        words = text.split()
+        if not words:
+            return 100
+
+        score = 0
+        for word in words:
+            if len(word) < 2:
+                score += 5
+            elif len(word) > 15:
+                score += 3
+            else:
+                score -= 1
+
+        return max(0, score)
+
+    def set_wordlist(self, words):
+        """Score whole words against another vocabulary, e.g. cipher_dictionary.load_wordlist(path)"""
+        self.common_words = frozenset(word.upper() for word in words)
+        self._word_index = None
+        self.analysis_cache.clear()
+
+    def calculate_word_score(self, text):
+        """Calculate word pattern score"""
+        words = text.upper().split()
+
+        if not words:
+            return 100
+
+        matches = sum(1 for word in words if word in self.common_words)
+        return max(0, 50 - (matches * 2))
+
+    def word_shift_index(self):
+        """shift_key -> offsets of the common words with that key, built on first use"""
+        if self._word_index is None:
+            index = {}
+            for word in self.common_words:
+                key, offset = shift_key(word)
+                index.setdefault(key, []).append(offset)
+            self._word_index = index
+        return self._word_index
+
+    def score_tokens(self, tokens):
+        """(readability, {shift: word score}) for every shift from a Counter of text.split() tokens
+
+        Equals calculate_readability and calculate_word_score of each decoded
+        candidate. Word lengths do not change under a shift, so readability
+        is a single value, and one word_shift_index lookup per distinct
+        token finds the shifts under which it decodes to a common word.
+        """
+        readability, matches = self.tally_tokens(tokens)
+        return self.token_scores(readability, matches, sum(tokens.values()))
+
+    def token_scores(self, readability, matches, word_count):
+        """score_tokens from tally_tokens sums, which add up over the pieces of a text"""
+        if not word_count:
+            return 100, {shift: 100 for shift in range(1, 26)}
+        return max(0, readability), {shift: max(0, 50 - (matches[shift] * 2)) for shift in range(1, 26)}
+
+    def tally_tokens(self, tokens):
+        """(readability sum, common-word matches per shift) of a Counter of tokens, before clamping"""
+        readability = 0
+        matches = [0] * 26
+        index = self.word_shift_index()
+        for token, count in tokens.items():
+            length = len(token)
+            readability += count * (5 if length < 2 else 3 if length > 15 else -1)
+            if token.isascii():
+                key, offset = shift_key(token.upper())
+                for word_offset in index.get(key, ()):
+                    if offset is None:
+                        for shift in range(26):
+                            matches[shift] += count
+                    else:
+                        matches[(offset - word_offset) % 26] += count
+            else:
+                # Upper-casing some non-ASCII letters yields ASCII ones, so decode first
+                for shift in range(1, 26):
+                    if caesar_decrypt(token, shift).upper() in self.common_words:
+                        matches[shift] += count
+        return readability, matches
+
+    def pattern_matches(self, counts, shift):
+        """How many of the common digrams and trigrams occur in the text decoded with shift"""
+        digram_counts, trigram_counts = self.pattern_counts(counts, shift)
+        digram_matches = sum(1 for count in digram_counts if count)
+        trigram_matches = sum(1 for count in trigram_counts if count)
+        return digram_matches, trigram_matches
+
+    def analyze(self, text, counts=None):
+        """Shared TextAnalysis of text, computed once per distinct input and scorer
+
+        counts may be passed when the caller already holds count_ngrams(text).
+        """
+        key = (self.scorer, AnalysisCache.content_key(text))
+        analysis = self.analysis_cache.get(key)
+        if analysis is None:
+            analysis = TextAnalysis(self, text, counts)
+            self.analysis_cache.put(key, analysis)
+        return analysis
+
+    def combined_scores(self, text):
+        """Frequency + readability + word score for every shift (lower is better)"""
+        return TextAnalysis(self, text).combined_scores()
+
+    def intelligent_guess(self, text):
+        """Best (shift, score) according to all analysis"""
+        return min(self.combined_scores(text), key=lambda x: x[1])
+
+    def detect_progressive(self, text, confidence=DEFAULT_CONFIDENCE, initial_chars=512, growth=4, rank=None):
+        """Detect the shift from the shortest prefix that settles it
+
+        Prefixes grow geometrically until the best shift's posterior
+        probability (see ProgressiveDetector) reaches confidence; only that
+        prefix is then ranked, by rank(sample) -> (shift, score) or the
+        selected scorer.
+        """
+        detector = ProgressiveDetector(self.english_freq, confidence)
+        end = 0
+        size = initial_chars
+        while end < len(text):
+            start, end = end, min(len(text), size)
+            detector.add(text[start:end])
+            if detector.confident:
+                break
+            size *= growth
+
+        sample = text[:end]
+        if rank is None:
+            shift, score = min(self.score_shifts(sample), key=lambda x: x[1])
+        else:
+            shift, score = rank(sample)
+        return DetectionResult(shift, score, detector.probability(shift), end, detector.total_letters)
+
+
+# Engines shared within a process by (scorer, word list path), created on first use
+_SHARED_ENGINES = {}
+
+
+def shared_engine(scorer='enhanced', wordlist=None):
+    """Per-process engine, so tables, models and word lists are loaded once per worker"""
+    if scorer not in SCORERS:
+        raise ValueError(f"Unknown scorer {scorer!r}, expected one of {SCORERS}")
+    key = (scorer, wordlist)
+    if key not in _SHARED_ENGINES:
+        engine = CaesarEngine(scorer)
+        if wordlist:
+            from cipher_dictionary import load_wordlist
+            engine.set_wordlist(load_wordlist(wordlist))
+        _SHARED_ENGINES[key] = engine
+    return _SHARED_ENGINES[key]
+
+
+class NgramCounter:
+    """count_ngrams of a text fed a chunk at a time
+
+    Each chunk's tables are counted with the last two letters of the text
+    before it prepended, so n-grams across chunk joins are counted once,
+    and are added to the running tables.
+    """
+
+    def __init__(self):
+        self.total_letters = 0
+        self.tables = None
+        self._carry = ''
+
+    def add(self, text):
+        """Count the next chunk"""
+        letters_only = letter_sequence(text)
+        if not isinstance(letters_only, str):
+            letters_only = letters_only.decode('ascii')
+        if not letters_only:
+            return
+        joined = self._carry + letters_only
+        letter_counts, digram_table, trigram_table = letter_tables(joined)
+        # The carried letters and their digram were counted with the previous chunk
+        for letter in self._carry:
+            if 'A' <= letter <= 'Z':
+                letter_counts[ord(letter) - 65] -= 1
+        if len(self._carry) == 2 and ngram_index(self._carry) is not None:
+            digram_table[ngram_index(self._carry)] -= 1
+
+        tables = (letter_counts, digram_table, trigram_table)
+        self.tables = tables if self.tables is None else tuple(map(add_tables, self.tables, tables))
+        self.total_letters += len(letters_only)
+        self._carry = joined[-2:]
+
+    def counts(self):
+        """The tables in the count_ngrams format"""
+        if self.tables is None:
+            return (0,) + tuple(letter_tables(''))
+        return (self.total_letters,) + self.tables
+
+
+class TextTally:
+    """What a TextAnalysis needs of a text, gathered a chunk at a time without keeping the text
+
+    Only the first head_chars characters are kept, for previews. Tokens and
+    quadgrams that straddle chunk joins are carried into the next chunk.
+    """
+
+    # Distinct tokens collected before they are scored and dropped
+    TOKEN_BATCH = 1 << 15
+
+    def __init__(self, engine, head_chars=1024):
+        self.engine = engine
+        self.head_chars = head_chars
+        self.head = ''
+        self.chars = 0
+        self.ngrams = NgramCounter()
+        self.word_count = 0
+        self.readability = 0
+        self.matches = [0] * 26
+        self._tokens = Counter()
+        self._partial = []
+        self.quadgram_count = 0
+        self.quadgram_log_likelihoods = [0.0] * 25
+        self._quadgram_carry = ''
+
+    def add(self, chunk):
+        """Tally the next str chunk"""
+        if not chunk:
+            return
+        if len(self.head) < self.head_chars:
+            self.head += chunk[:self.head_chars - len(self.head)]
+        self.chars += len(chunk)
+        self.ngrams.add(chunk)
+
+        # A token touching the end of the chunk may go on in the next one
+        tokens = chunk.split()
+        if len(tokens) == 1 and len(tokens[0]) == len(chunk):
+            self._partial.append(chunk)
+        else:
+            if tokens and not chunk[0].isspace():
+                tokens[0] = ''.join(self._partial) + tokens[0]
+            elif self._partial:
+                tokens.insert(0, ''.join(self._partial))
+            self._partial = [tokens.pop()] if tokens and not chunk[-1].isspace() else []
+            self._add_tokens(tokens)
+
+        if self.engine.scorer == 'quadgram':
+            from cipher_quadgrams import default_model
+            letters = self._quadgram_carry + letter_sequence(chunk)
+            total, log_likelihoods = default_model().tally(letters)
+            self.quadgram_count += total
+            self.quadgram_log_likelihoods = [a + b for a, b in zip(self.quadgram_log_likelihoods, log_likelihoods)]
+            self._quadgram_carry = letters[-3:]
+
+    def finish(self):
+        """Tally the tokens still pending at the end of the text"""
+        if self._partial:
+            self._add_tokens([''.join(self._partial)])
+            self._partial = []
+        self._score_tokens()
+
+    def _add_tokens(self, tokens):
+        self._tokens.update(tokens)
+        self.word_count += len(tokens)
+        if len(self._tokens) >= self.TOKEN_BATCH:
+            self._score_tokens()
+
+    def _score_tokens(self):
+        if self._tokens:
+            readability, matches = self.engine.tally_tokens(self._tokens)
+            self.readability += readability
+            self.matches = [a + b for a, b in zip(self.matches, matches)]
+            self._tokens = Counter()
+
+    def quality_scores(self):
+        """(shift, score) for every shift with the engine's scorer"""
+        if self.engine.scorer == 'quadgram':
+            from cipher_quadgrams import QuadgramModel
+            return QuadgramModel.tally_scores(self.quadgram_count, self.quadgram_log_likelihoods)
+        counts = self.ngrams.counts()
+        return [(shift, self.engine.score_counts(counts, shift)) for shift in range(1, 26)]
+
+
+class TextAnalysis:
+    """Per-shift frequency, readability, word and pattern scores of one input
+
+    Built once per distinct input by CaesarEngine.analyze and read by every
+    analysis view, so switching views on the same text recomputes nothing.
+    """
+
+    def __init__(self, engine, text, counts=None, tally=None):
+        self.engine = engine
+        self.text = text
+        self.scorer = engine.scorer
+        if tally is None:
+            self.length = len(text)
+            self.counts = counts if counts is not None else engine.count_ngrams(text)
+            self.quality_scores = dict(engine.score_shifts(text, self.counts))
+
+            # Tokenized once: no candidate is decrypted or split
+            tokens = Counter(text.split())
+            self.word_count = sum(tokens.values())
+            readability, self.word_scores = engine.score_tokens(tokens)
+        else:
+            # text is only the start of the input that the tally kept
+            self.length = tally.chars
+            self.counts = tally.ngrams.counts()
+            self.quality_scores = dict(tally.quality_scores())
+            self.word_count = tally.word_count
+            readability, self.word_scores = engine.token_scores(tally.readability, tally.matches, tally.word_count)
+        self.readability_scores = dict.fromkeys(range(1, 26), readability)
+        self.pattern_match_counts = {shift: engine.pattern_matches(self.counts, shift) for shift in range(1, 26)}
+
+        self._frequencies = {}
+
+    @classmethod
+    def from_chunks(cls, engine, chunks, head_chars=1024):
+        """TextAnalysis of a text given as str chunks, keeping only its first head_chars characters"""
+        tally = TextTally(engine, head_chars)
+        for chunk in chunks:
+            tally.add(chunk)
+        tally.finish()
+        return cls(engine, tally.head, tally=tally)
+
+    def frequency(self, shift=0):
+        """(letter_freq, digram_freq, trigram_freq) of the text decoded with shift"""
+        if shift not in self._frequencies:
+            self._frequencies[shift] = self.engine.shift_frequency(self.counts, shift)
+        return self._frequencies[shift]
+
+    def combined_scores(self):
+        """(shift, quality + readability + word score) for every shift"""
+        return [(shift, self.quality_scores[shift] + self.readability_scores[shift] + self.word_scores[shift])
+                for shift in range(1, 26)]
+
+    def top_candidates(self, k=5, scores=None, largest=False):
+        """The k best (shift, score, ...) tuples of scores (default: combined_scores), best first
+
+        Selected with a heap, ties in shift order; nothing is decoded, so
+        callers decode only the previews they show, with preview().
+        """
+        if scores is None:
+            scores = self.combined_scores()
+        select = heapq.nlargest if largest else heapq.nsmallest
+        return select(k, scores, key=lambda x: x[1])
+
+    def preview(self, shift, length=80):
+        """The first length characters of the text decoded with shift"""
+        return caesar_decrypt(self.text[:length], shift)
+
+    def best_quality(self):
+        """(shift, score) with the best quality score"""
+        return min(self.quality_scores.items(), key=lambda x: x[1])
+
+    def best_combined(self):
+        """(shift, score) with the best combined score"""
+        return min(self.combined_scores(), key=lambda x: x[1])
+
+    @property
+    def nbytes(self):
+        """Approximate memory held, for cache accounting"""
+        total_letters, letter_counts, digram_table, trigram_table = self.counts
+        return sys.getsizeof(self.text) + 8 * (len(letter_counts) + len(digram_table) + len(trigram_table)) + 16384
+
+
+class AnalysisCache:
+    """LRU of TextAnalysis objects keyed by content hash, bounded by entries and bytes"""
+
+    def __init__(self, max_entries=16, max_bytes=256 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def content_key(text, block_size=1 << 20):
+        """Digest identifying a text's content, hashed a block at a time"""
+        digest = hashlib.blake2b(digest_size=16)
+        for start in range(0, len(text), block_size):
+            digest.update(text[start:start + block_size].encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Cached analysis for key, or None"""
+        analysis = self._entries.get(key)
+        if analysis is not None:
+            self._entries.move_to_end(key)
+        return analysis
+
+    def put(self, key, analysis):
+        """Cache an analysis, evicting least recently used entries over the limits"""
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key).nbytes
+        self._entries[key] = analysis
+        self.nbytes += analysis.nbytes
+        while self._entries and (len(self._entries) > self.max_entries or self.nbytes > self.max_bytes):
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class IncrementalStats:
+    """Letter, digram and trigram counts of a document kept current from edit deltas
+
+    Counts cover the same letter sequence as CaesarEngine.count_ngrams, so
+    counts() can be passed straight to score_counts/shift_frequency.
+    """
+
+    # Letters of unchanged text needed on each side of an edit to cover
+    # every trigram that touches it
+    CONTEXT_LETTERS = 2
+
+    # Segments with at least this many letters are counted as whole tables
+    # rather than one n-gram at a time
+    BULK_LETTERS = 1024
+
+    def __init__(self, text=''):
+        self.total_letters = 0
+        self.letter_counts = [0] * 26
+        self.digram_table = [0] * 26 ** 2
+        self.trigram_table = [0] * 26 ** 3
+        if text:
+            self.replace('', '', text, '')
+
+    @classmethod
+    def has_context(cls, text):
+        """Whether a context string holds enough letters"""
+        letters = 0
+        for c in text:
+            if c.isalpha():
+                letters += 1
+                if letters >= cls.CONTEXT_LETTERS:
+                    return True
+        return False
+
+    def replace(self, before, old, new, after):
+        """Apply an edit where old, between the context strings before and after, became new
+
+        before/after must either hold CONTEXT_LETTERS letters or reach the
+        start/end of the document. Cost is proportional to the strings given.
+        """
+        self._apply(before + old + after, -1)
+        self._apply(before + new + after, 1)
+
+    def _apply(self, segment, sign):
+        letters_only = letter_sequence(segment)
+        if not letters_only:
+            return
+        if len(letters_only) >= self.BULK_LETTERS:
+            self._apply_tables(letters_only, sign)
+            return
+
+        self.total_letters += sign * len(letters_only)
+        for letter in letters_only:
+            index = ord(letter) - 65
+            if 0 <= index < 26:
+                self.letter_counts[index] += sign
+
+        for table, n in ((self.digram_table, 2), (self.trigram_table, 3)):
+            for i in range(len(letters_only) - n + 1):
+                index = ngram_index(letters_only[i:i+n])
+                if index is not None:
+                    table[index] += sign
+
+    def _apply_tables(self, letters_only, sign):
+        """Add or subtract the whole tables of a long run of letters, in place"""
+        tables = letter_tables(letters_only)
+        self.total_letters += sign * len(letters_only)
+        np = optional_numpy()
+        for table, delta in zip((self.letter_counts, self.digram_table, self.trigram_table), tables):
+            if np is not None:
+                table[:] = (np.asarray(table) + sign * np.asarray(delta)).tolist()
+            else:
+                table[:] = [count + sign * change for count, change in zip(table, delta)]
+
+    def counts(self):
+        """Live counts in the count_ngrams format"""
+        return self.total_letters, self.letter_counts, self.digram_table, self.trigram_table
+
+    def snapshot(self):
+        """Copy of the counts that stays valid while the document keeps changing"""
+        return self.total_letters, list(self.letter_counts), list(self.digram_table), list(self.trigram_table)
+
+
+class ProgressiveDetector:
+    """Letter histogram of a growing sample and how decisively it picks a shift
+
+    Each shift's log-likelihood under the expected letter frequencies is
+    compared with the others; with equal priors the best shift's posterior
+    probability is 1 / sum(exp(LL_s - LL_best)).
+    """
+
+    def __init__(self, expected_freq=ENGLISH_FREQ, confidence=DEFAULT_CONFIDENCE):
+        self.confidence = confidence
+        self.log_freq = [math.log(expected_freq[letter] / 100) for letter in string.ascii_uppercase]
+        self.letter_counts = [0] * 26
+        self.total_letters = 0
+        self.chars = 0
+
+    def add(self, text):
+        """Add the next piece of the sample"""
+        letters_only = letter_sequence(text)
+        letters = string.ascii_uppercase if isinstance(letters_only, str) else _LETTER_CODES
+        for i, letter in enumerate(letters):
+            self.letter_counts[i] += letters_only.count(letter)
+        self.total_letters += len(letters_only)
+        self.chars += len(text)
+
+    def log_likelihoods(self):
+        """(shift, log-likelihood) of the sample decoded with every shift"""
+        counts = self.letter_counts
+        return [(shift, sum(counts[(i + shift) % 26] * log_p for i, log_p in enumerate(self.log_freq)))
+                for shift in range(1, 26)]
+
+    def posteriors(self):
+        """(shift, probability) for every shift, assuming equal priors"""
+        likelihoods = self.log_likelihoods()
+        best = max(ll for shift, ll in likelihoods)
+        weights = [(shift, math.exp(ll - best)) for shift, ll in likelihoods]
+        total = sum(w for shift, w in weights)
+        return [(shift, w / total) for shift, w in weights]
+
+    def probability(self, shift):
+        """Posterior probability of one shift; None without letters or for shifts outside 1-25"""
+        if not self.total_letters:
+            return None
+        return dict(self.posteriors()).get(shift)
+
+    def best(self):
+        """(shift, probability) of the most likely shift"""
+        return max(self.posteriors(), key=lambda x: x[1])
+
+    @property
+    def confident(self):
+        """Whether the most likely shift has reached the confidence threshold"""
+        return self.total_letters > 0 and self.best()[1] >= self.confidence
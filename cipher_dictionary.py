@@ -0,0 +1,135 @@
+"""Word lists and multi-pattern matching for word and pattern scoring
+
+Whole-word lookups go through frozensets, so a 100k-word list costs one
+hash probe per word. Substring patterns are found in one pass over the
+text with an Aho-Corasick automaton, whose cost does not depend on how
+many patterns it holds.
+"""
+from collections import deque
+
+# Up to this many patterns, per-pattern str scans in C beat one pass of
+# the automaton in Python
+SMALL_VOCABULARY = 16
+
+_WORDLISTS = {}
+
+
+def load_wordlist(path):
+    """Frozen set of the upper-cased words in a file, one per line ('#' starts a comment)
+
+    Each file is read once per process.
+    """
+    if path not in _WORDLISTS:
+        words = set()
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                word = line.split('#', 1)[0].strip().upper()
+                if word:
+                    words.add(word)
+        _WORDLISTS[path] = frozenset(words)
+    return _WORDLISTS[path]
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton over a fixed set of patterns
+
+    Each state keeps only its own trie edges plus a failure link, so memory
+    stays proportional to the total pattern length; outputs are merged along
+    the failure links when the automaton is built.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(dict.fromkeys(patterns))
+        goto = [{}]
+        outputs = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                if ch not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            outputs[state].append(index)
+
+        # Breadth-first, so every failure state is finished before it is used
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for ch, child in goto[state].items():
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = goto[fallback].get(ch, 0)
+                queue.append(child)
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(output) for output in outputs]
+
+    def count(self, text):
+        """Occurrences of every pattern in text, overlaps included"""
+        counts = [0] * len(self.patterns)
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in outputs[state]:
+                counts[index] += 1
+        return dict(zip(self.patterns, counts))
+
+    def present(self, text):
+        """Set of patterns occurring in text"""
+        return {pattern for pattern, count in self.count(text).items() if count}
+
+
+def overlaps_itself(pattern):
+    """Whether two occurrences of pattern can overlap, i.e. a proper suffix is also a prefix"""
+    return any(pattern.startswith(pattern[i:]) for i in range(1, len(pattern)))
+
+
+def count_overlapping(text, pattern):
+    """Occurrences of pattern in text, overlaps included"""
+    count = 0
+    start = text.find(pattern)
+    while start != -1:
+        count += 1
+        start = text.find(pattern, start + 1)
+    return count
+
+
+class PatternMatcher:
+    """Counts which of a set of substring patterns occur in a text
+
+    Small vocabularies are scanned with str methods; larger ones use one
+    AhoCorasick pass. Both count every occurrence, overlaps included, so
+    'AA' occurs twice in 'AAA' whichever path runs. Empty patterns are
+    ignored.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = [pattern for pattern in dict.fromkeys(patterns) if pattern]
+        self._automaton = AhoCorasick(self.patterns) if len(self.patterns) > SMALL_VOCABULARY else None
+        # str.count skips overlaps, which only matters for patterns that can overlap themselves
+        self._overlapping = {pattern for pattern in self.patterns if overlaps_itself(pattern)}
+
+    def count(self, text):
+        """Occurrences of every pattern in text, overlaps included"""
+        if self._automaton is None:
+            return {pattern: count_overlapping(text, pattern) if pattern in self._overlapping else text.count(pattern)
+                    for pattern in self.patterns}
+        return self._automaton.count(text)
+
+    def matches(self, text):
+        """Number of distinct patterns found in text"""
+        if self._automaton is None:
+            return sum(1 for pattern in self.patterns if pattern in text)
+        return len(self._automaton.present(text))
+
+    def __len__(self):
+        return len(self.patterns)
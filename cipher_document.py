@@ -0,0 +1,91 @@
+"""Memory-mapped large documents shown one page at a time
+
+The file stays in a read-only memory map; only the page on screen is
+decoded into a str, so a 100 MB file costs one page of Python memory.
+Pages end on a newline where one is close, otherwise on a UTF-8 character
+boundary, so every page decodes on its own. Shifting works on the raw
+bytes, which is exact for ASCII-compatible encodings such as UTF-8.
+"""
+import mmap
+import os
+
+from cipher_core import caesar_decrypt
+
+# Files at least this large are opened as a MappedDocument instead of
+# being inserted into the text widget
+LARGE_DOCUMENT_BYTES = 2 << 20
+
+PAGE_BYTES = 1 << 16
+
+# Leading part of a document used for detection and analysis
+ANALYSIS_SAMPLE_BYTES = 1 << 20
+
+# How far past a page boundary to look for a newline to end the page on
+_NEWLINE_SEARCH_BYTES = 4096
+
+
+class MappedDocument:
+    """A read-only memory-mapped text file split into pages"""
+
+    def __init__(self, path, encoding='utf-8', page_bytes=PAGE_BYTES):
+        self.path = path
+        self.encoding = encoding
+        self.size = os.path.getsize(path)
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self.page_starts = self._paginate(page_bytes)
+
+    def _boundary(self, position):
+        """First page boundary at or after position"""
+        if position >= self.size:
+            return self.size
+        newline = self._map.find(b'\n', position, min(self.size, position + _NEWLINE_SEARCH_BYTES))
+        if newline != -1:
+            return newline + 1
+        # Never split a multi-byte character: skip UTF-8 continuation bytes
+        while position < self.size and self._map[position] & 0xC0 == 0x80:
+            position += 1
+        return position
+
+    def _paginate(self, page_bytes):
+        starts = [0]
+        position = self._boundary(page_bytes)
+        while position < self.size:
+            starts.append(position)
+            position = self._boundary(position + page_bytes)
+        return starts
+
+    @property
+    def page_count(self):
+        return len(self.page_starts)
+
+    def page_range(self, page):
+        """(start, end) byte offsets of a page"""
+        start = self.page_starts[page]
+        end = self.page_starts[page + 1] if page + 1 < len(self.page_starts) else self.size
+        return start, end
+
+    def page_text(self, page, shift=0):
+        """One page as text, decoded with shift"""
+        start, end = self.page_range(page)
+        data = self._map[start:end]
+        if shift:
+            data = caesar_decrypt(data, shift)
+        return data.decode(self.encoding, 'surrogateescape')
+
+    def sample_text(self, max_bytes=ANALYSIS_SAMPLE_BYTES):
+        """The leading max_bytes of the document as text, cut at a page-style boundary"""
+        end = self._boundary(min(self.size, max_bytes))
+        return self._map[:end].decode(self.encoding, 'surrogateescape')
+
+    def write_decoded(self, path, shift):
+        """Decode the whole document into path a page at a time"""
+        with open(path, 'wb') as f:
+            for page in range(self.page_count):
+                start, end = self.page_range(page)
+                f.write(caesar_decrypt(self._map[start:end], shift))
+
+    def close(self):
+        if self.size:
+            self._map.close()
+        self._file.close()
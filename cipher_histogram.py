@@ -0,0 +1,133 @@
+"""Letter and n-gram histograms of huge files, counted in parallel over a memory map
+
+The file is split into byte ranges aligned to mmap.ALLOCATIONGRANULARITY
+and each worker process maps only its own range, so nothing is pickled
+but the path and two offsets. A worker counts its range in blocks and
+returns a FileHistogram; FileHistogram.merge adds the tables and counts
+the digrams and trigrams that straddle the joins, from the first and last
+two letters of each side. The merged counts are in count_ngrams form and
+feed score_counts and shift_frequency unchanged.
+
+Counting is on the raw bytes: ASCII letters are counted exactly, and
+bytes outside ASCII (parts of multi-byte UTF-8 characters) are skipped
+like punctuation, which matches count_ngrams on ASCII text.
+"""
+import json
+import mmap
+import os
+import sys
+import time
+
+from cipher_core import CaesarEngine, add_tables, ascii_letters, letter_byte_tables, ngram_index
+
+# Bytes each worker task covers; several per worker keeps the pool busy to the end
+DEFAULT_RANGE_BYTES = 256 << 20
+
+# Bytes of a range translated and counted at once, bounding worker memory
+BLOCK_BYTES = 4 << 20
+
+
+class FileHistogram:
+    """Letter, digram and trigram counts of a span of letters, plus its first and last two letters"""
+
+    def __init__(self, letters=b''):
+        self.total = len(letters)
+        self.head = letters[:2]
+        self.tail = letters[-2:]
+        self.letter_counts, self.digram_table, self.trigram_table = letter_byte_tables(letters)
+
+    def merge(self, other):
+        """Append the counts of the letters following this span"""
+        joined = (self.tail + other.head).decode('ascii')
+        for n, table in ((2, self.digram_table), (3, self.trigram_table)):
+            # n-grams starting in this span's tail and ending in the other's head
+            for i in range(len(self.tail)):
+                if i + n > len(self.tail) and i + n <= len(joined):
+                    table[ngram_index(joined[i:i + n])] += 1
+
+        if self.total < 2:
+            self.head = (self.head + other.head)[:2]
+        self.tail = (self.tail + other.head)[-2:] if other.total < 2 else other.tail
+        self.total += other.total
+        self.letter_counts = add_tables(self.letter_counts, other.letter_counts)
+        self.digram_table = add_tables(self.digram_table, other.digram_table)
+        self.trigram_table = add_tables(self.trigram_table, other.trigram_table)
+        return self
+
+    def counts(self):
+        """The histogram as a count_ngrams tuple"""
+        return self.total, self.letter_counts, self.digram_table, self.trigram_table
+
+
+def file_ranges(size, range_bytes=DEFAULT_RANGE_BYTES):
+    """(start, end) byte ranges covering size bytes, every start a multiple of the mmap granularity"""
+    granularity = mmap.ALLOCATIONGRANULARITY
+    range_bytes = max(granularity, range_bytes - range_bytes % granularity)
+    return [(start, min(size, start + range_bytes)) for start in range(0, size, range_bytes)]
+
+
+def count_range(path, start, end, block_bytes=BLOCK_BYTES):
+    """FileHistogram of bytes start:end of path, read through a map of just that range"""
+    histogram = FileHistogram()
+    if end <= start:
+        return histogram
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), end - start, access=mmap.ACCESS_READ, offset=start) as data:
+        for offset in range(0, end - start, block_bytes):
+            block = data[offset:offset + block_bytes]
+            histogram.merge(FileHistogram(ascii_letters(block)))
+    return histogram
+
+
+def count_file(path, workers=None, range_bytes=DEFAULT_RANGE_BYTES):
+    """Whole-file FileHistogram, with ranges counted across worker processes
+
+    workers=1 counts in this process.
+    """
+    ranges = file_ranges(os.path.getsize(path), range_bytes)
+    histogram = FileHistogram()
+    if workers == 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            histogram.merge(count_range(path, start, end))
+        return histogram
+
+    from concurrent.futures import ProcessPoolExecutor
+    starts, ends = zip(*ranges)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map keeps file order, which the boundary stitching relies on
+        for part in executor.map(count_range, [path] * len(ranges), starts, ends):
+            histogram.merge(part)
+    return histogram
+
+
+def detect_file(path, engine=None, workers=None, range_bytes=DEFAULT_RANGE_BYTES):
+    """Best (shift, score) of a whole file from its parallel histogram, plus the count_ngrams tuple"""
+    engine = engine or CaesarEngine()
+    counts = count_file(path, workers, range_bytes).counts()
+    if not counts[0]:
+        return 0, None, counts
+    shift, score = min(((shift, engine.score_counts(counts, shift)) for shift in range(1, 26)),
+                       key=lambda x: x[1])
+    return shift, score, counts
+
+
+def run_detect(args):
+    """Entry point for `ceasecipher detect`"""
+    engine = CaesarEngine()
+    start = time.perf_counter()
+    shift, score, counts = detect_file(args.input, engine, args.workers, args.range_mb << 20)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    letter_freq, digram_freq, trigram_freq = engine.shift_frequency(counts, shift)
+    size = os.path.getsize(args.input)
+    print(json.dumps({
+        'file': args.input,
+        'bytes': size,
+        'letters': counts[0],
+        'shift': shift,
+        'score': round(score, 4) if score is not None else None,
+        'letter_freq': {letter: round(freq, 4) for letter, freq in letter_freq.items()},
+        'digrams': digram_freq,
+        'trigrams': trigram_freq
+    }))
+    print(f"Counted {size / 1e6:.1f} MB in {elapsed:.2f}s ({size / 1e6 / elapsed:.1f} MB/s)", file=sys.stderr)
+    return 0
@@ -0,0 +1,215 @@
+"""Bounded decryption history backed by an append-only JSONL log
+
+Entries hold input and output previews, i.e. plaintext. The log goes to
+~/.ceasecipher_history.jsonl unless the CEASECIPHER_HISTORY environment
+variable names another file, or is empty or 'off' to keep history in
+memory only.
+"""
+import json
+import os
+from collections import deque
+
+# Entries kept in memory; older ones only live in the log
+DEFAULT_CAPACITY = 500
+
+# The log is rotated to <path>.1 once it grows past this size
+DEFAULT_MAX_LOG_BYTES = 8 << 20
+
+ENV_VAR = 'CEASECIPHER_HISTORY'
+
+# Environment values that turn a setting off, ignoring case and surrounding spaces
+OFF_VALUES = ('', '0', 'off', 'none', 'false', 'no')
+
+
+def is_off(value):
+    """Whether an environment variable's value is one of OFF_VALUES"""
+    return value.strip().lower() in OFF_VALUES
+
+
+def default_log_path():
+    """Log path chosen by ENV_VAR, or None when it turns the log off"""
+    path = os.environ.get(ENV_VAR)
+    if path is None:
+        return os.path.join(os.path.expanduser('~'), '.ceasecipher_history.jsonl')
+    if is_off(path):
+        return None
+    return os.path.expanduser(path)
+
+
+# None keeps history in memory only
+DEFAULT_LOG_PATH = default_log_path()
+
+
+class HistoryEntry:
+    """One history record"""
+    __slots__ = ('seq', 'time', 'action', 'score', 'input_preview', 'output_preview')
+
+    def __init__(self, time, action, score, input_preview='', output_preview='', seq=0):
+        self.seq = seq
+        self.time = time
+        self.action = action
+        self.score = score
+        self.input_preview = input_preview
+        self.output_preview = output_preview
+
+    def to_dict(self):
+        return {
+            'time': self.time,
+            'action': self.action,
+            'score': self.score,
+            'input_preview': self.input_preview,
+            'output_preview': self.output_preview
+        }
+
+    @classmethod
+    def from_dict(cls, data, seq=0):
+        return cls(data['time'], data['action'], data['score'],
+                   data.get('input_preview', ''), data.get('output_preview', ''), seq)
+
+
+def parse_entries(lines):
+    """HistoryEntry of every JSON line, skipping damaged ones"""
+    for line in lines:
+        try:
+            yield HistoryEntry.from_dict(json.loads(line))
+        except (ValueError, KeyError, TypeError):
+            continue
+
+
+def read_log(path):
+    """Replay every entry of a JSONL history log, skipping damaged lines"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        yield from parse_entries(f)
+
+
+def tail_lines(path, count, block_size=1 << 16):
+    """Last count lines of a file, read backwards a block at a time"""
+    if count <= 0:
+        return []
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        while position > 0 and data.count(b'\n') <= count:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    return [line.decode('utf-8', 'replace') for line in data.splitlines()[-count:] if line]
+
+
+class HistoryLog:
+    """Fixed-capacity ring buffer of HistoryEntry, mirrored to a JSONL log when path is set
+
+    Entries get increasing sequence numbers so views can ask for just the
+    ones added since they last looked.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, path=None, max_log_bytes=DEFAULT_MAX_LOG_BYTES):
+        self.entries = deque(maxlen=capacity)
+        self.path = path
+        self.max_log_bytes = max_log_bytes
+        self.last_seq = 0
+        self._log = None
+
+    def replay(self):
+        """Fill the buffer with the newest entries of the existing log"""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        loaded = 0
+        for entry in parse_entries(tail_lines(self.path, self.entries.maxlen)):
+            self._push(entry)
+            loaded += 1
+        return loaded
+
+    def _push(self, entry):
+        self.last_seq += 1
+        entry.seq = self.last_seq
+        self.entries.append(entry)
+
+    def append(self, entry):
+        """Add an entry to the buffer and the log"""
+        self._push(entry)
+        if self.path:
+            try:
+                log = self._open_log()
+                log.write(json.dumps(entry.to_dict()) + '\n')
+                log.flush()
+                if log.tell() > self.max_log_bytes:
+                    self._rotate()
+            except OSError:
+                # An unwritable log only costs persistence, never the session
+                self.close()
+                self.path = None
+        return entry
+
+    def _open_log(self):
+        if self._log is None:
+            self._log = open(self.path, 'a', encoding='utf-8')
+        return self._log
+
+    def _rotate(self):
+        self.close()
+        os.replace(self.path, self.path + '.1')
+
+    def since(self, seq):
+        """Buffered entries newer than seq, oldest first"""
+        if seq >= self.last_seq:
+            return []
+        newer = min(self.last_seq - seq, len(self.entries))
+        return list(self.entries)[-newer:]
+
+    def tail(self, count):
+        """The newest count buffered entries, oldest first"""
+        return list(self.entries)[-count:] if count > 0 else []
+
+    def export(self, filename, limit=None):
+        """Write the log (or just its last limit entries) to filename as JSON lines or a .json array
+
+        Without a log file only the buffered entries can be exported.
+        """
+        if self.path and os.path.exists(self.path):
+            if self._log is not None:
+                self._log.flush()
+            if limit is None:
+                entries = read_log(self.path)
+            else:
+                entries = parse_entries(tail_lines(self.path, limit))
+        else:
+            entries = self.tail(limit) if limit is not None else list(self.entries)
+
+        written = 0
+        as_array = filename.endswith('.json')
+        with open(filename, 'w', encoding='utf-8') as f:
+            if as_array:
+                f.write('[')
+            for entry in entries:
+                if as_array and written:
+                    f.write(',')
+                f.write(('\n  ' if as_array else '') + json.dumps(entry.to_dict()) + ('' if as_array else '\n'))
+                written += 1
+            if as_array:
+                f.write('\n]\n' if written else ']\n')
+        return written
+
+    def clear(self):
+        """Empty the buffer and delete the log along with its rotated copy"""
+        self.entries.clear()
+        self.close()
+        if self.path:
+            for path in (self.path, self.path + '.1'):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __bool__(self):
+        return bool(self.entries)
@@ -0,0 +1,165 @@
+"""Letter-frequency profiles of several languages, scored together
+
+Each profile is a small JSON file in data/languages holding the expected
+letter percentages plus the language's ten most common digrams and
+trigrams:
+
+    {"code": "fr", "name": "French", "letters": {"A": 7.64, ...},
+     "digrams": ["ES", ...], "trigrams": ["ENT", ...]}
+
+LanguageScorer rates all 25 shifts against every loaded language from one
+ciphertext count, with the same chi-squared minus pattern bonus as
+CaesarEngine.score_counts, so adding a language adds a row to a matrix
+rather than another pass over the text.
+"""
+import glob
+import json
+import os
+import string
+from collections import namedtuple
+
+from cipher_core import caesar_encrypt, ngram_index, optional_numpy
+
+LANGUAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'languages')
+
+LanguageProfile = namedtuple('LanguageProfile', 'code name letter_freq digrams trigrams')
+
+# Best (language, shift) pair for a text; lower scores are better
+LanguageMatch = namedtuple('LanguageMatch', 'code name shift score')
+
+_PROFILES = {}
+
+
+def load_profile(path):
+    """LanguageProfile from one JSON data file, read once per process"""
+    if path not in _PROFILES:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        code = data.get('code') or os.path.splitext(os.path.basename(path))[0]
+        letters = {letter: float(data['letters'].get(letter, 0)) for letter in string.ascii_uppercase}
+        _PROFILES[path] = LanguageProfile(code, data.get('name', code), letters,
+                                          [d.upper() for d in data.get('digrams', [])],
+                                          [t.upper() for t in data.get('trigrams', [])])
+    return _PROFILES[path]
+
+
+def available_languages(directory=LANGUAGE_DIR):
+    """Codes of the profiles in a directory, sorted"""
+    return sorted(os.path.splitext(os.path.basename(path))[0]
+                  for path in glob.glob(os.path.join(directory, '*.json')))
+
+
+def load_languages(codes=None, directory=LANGUAGE_DIR):
+    """Profiles for codes (default: every profile in directory), in the order given"""
+    if codes is None:
+        codes = available_languages(directory)
+    profiles = []
+    for code in codes:
+        path = os.path.join(directory, f'{code}.json')
+        if not os.path.exists(path):
+            raise ValueError(f"Unknown language {code!r}, expected one of {available_languages(directory)}")
+        profiles.append(load_profile(path))
+    if not profiles:
+        raise ValueError(f"No language profiles found in {directory}")
+    return profiles
+
+
+class LanguageScorer:
+    """Scores every shift against every profile from one count_ngrams result"""
+
+    def __init__(self, profiles):
+        self.profiles = list(profiles)
+        self.expected = [[profile.letter_freq[letter] for letter in string.ascii_uppercase]
+                         for profile in self.profiles]
+
+        # Encrypted index of each common pattern for every language and shift 1-25;
+        # rows are padded with -1, which the numpy path points at a zero cell
+        width = max([len(p.digrams) for p in self.profiles] + [len(p.trigrams) for p in self.profiles] + [1])
+
+        def shifted(patterns):
+            rows = []
+            for shift in range(1, 26):
+                indexes = [ngram_index(caesar_encrypt(gram, shift)) for gram in patterns]
+                rows.append([index for index in indexes if index is not None])
+            return rows
+
+        self.shifted_digrams = [shifted(p.digrams) for p in self.profiles]
+        self.shifted_trigrams = [shifted(p.trigrams) for p in self.profiles]
+        self._width = width
+
+        np = optional_numpy()
+        if np is not None:
+            self._prepare_arrays(np)
+
+    def _prepare_arrays(self, np):
+        expected = np.array(self.expected, dtype=np.float64)
+        self._inverse_expected = np.divide(1.0, expected, out=np.zeros_like(expected), where=expected > 0)
+        self._expected_sum = np.where(expected > 0, expected, 0).sum(axis=1)
+        # rotation[s - 1, i]: ciphertext letter that decodes to letter i under shift s
+        self._rotation = (np.arange(26)[None, :] + np.arange(1, 26)[:, None]) % 26
+
+        def padded(tables, pad):
+            array = np.full((len(tables), 25, self._width), pad, dtype=np.int64)
+            for l, rows in enumerate(tables):
+                for s, row in enumerate(rows):
+                    array[l, s, :len(row)] = row
+            return array
+
+        self._digram_index = padded(self.shifted_digrams, 26 ** 2)
+        self._trigram_index = padded(self.shifted_trigrams, 26 ** 3)
+
+    def score_matrix(self, counts):
+        """L x 25 scores, row per profile, column per shift 1-25 (lower is better)"""
+        total_letters, letter_counts, digram_table, trigram_table = counts
+        np = optional_numpy()
+        if np is None:
+            return self._score_matrix_python(counts)
+
+        observed = np.asarray(letter_counts, dtype=np.float64)
+        if total_letters:
+            observed = observed * (100.0 / total_letters)
+        rotated = observed[self._rotation]
+        # sum((o - e)^2 / e) = sum(o^2 / e) - 2 sum(o) + sum(e), letters with e = 0 skipped
+        present = self._inverse_expected > 0
+        chi_squared = ((rotated ** 2) @ self._inverse_expected.T
+                       - 2 * rotated @ present.T.astype(np.float64)
+                       + self._expected_sum[None, :]).T
+
+        # Padding points one past the end of each table at an appended zero
+        digrams = np.append(np.asarray(digram_table, dtype=np.int64), 0)
+        trigrams = np.append(np.asarray(trigram_table, dtype=np.int64), 0)
+        pattern_score = digrams[self._digram_index].sum(axis=2) * 2 + trigrams[self._trigram_index].sum(axis=2) * 3
+        return (chi_squared - pattern_score).tolist()
+
+    def _score_matrix_python(self, counts):
+        total_letters, letter_counts, digram_table, trigram_table = counts
+        matrix = []
+        for l, expected_row in enumerate(self.expected):
+            row = []
+            for shift in range(1, 26):
+                chi_squared = 0
+                for i, expected in enumerate(expected_row):
+                    observed = (letter_counts[(i + shift) % 26] / total_letters) * 100 if total_letters else 0
+                    if expected > 0:
+                        chi_squared += ((observed - expected) ** 2) / expected
+                pattern_score = (sum(digram_table[index] for index in self.shifted_digrams[l][shift - 1]) * 2
+                                 + sum(trigram_table[index] for index in self.shifted_trigrams[l][shift - 1]) * 3)
+                row.append(chi_squared - pattern_score)
+            matrix.append(row)
+        return matrix
+
+    def best(self, counts):
+        """LanguageMatch with the lowest score over all languages and shifts"""
+        matrix = self.score_matrix(counts)
+        score, l, shift = min((score, l, s + 1) for l, row in enumerate(matrix) for s, score in enumerate(row))
+        profile = self.profiles[l]
+        return LanguageMatch(profile.code, profile.name, shift, score)
+
+    def ranking(self, counts):
+        """(code, shift, score) of each language's best shift, best language first"""
+        matrix = self.score_matrix(counts)
+        best = []
+        for profile, row in zip(self.profiles, matrix):
+            score, shift = min((score, s + 1) for s, score in enumerate(row))
+            best.append((profile.code, shift, score))
+        return sorted(best, key=lambda x: x[2])
@@ -0,0 +1,167 @@
+"""Vectorized shift detection for large batches of short messages
+
+best_shifts() encodes a block of ciphertexts as a padded uint8 matrix of
+letter indexes (A-Z as 0-25, 26 as padding, everything else dropped),
+takes the letter, digram and trigram histograms of every message at once
+and scores all messages x all 25 shifts with a few matrix products. The
+scores equal CaesarEngine.score_counts, so the chosen shifts are the
+enhanced scorer's, without per-message Python overhead.
+"""
+import string
+
+from cipher_core import CaesarEngine, optional_numpy, shared_engine
+
+PAD = 26
+
+# Messages encoded into one matrix at a time
+BLOCK_MESSAGES = 1024
+
+# Longer messages are scored one at a time rather than widening the whole
+# block's matrix to fit them
+MAX_BATCH_CHARS = 4096
+
+
+class MessageScorer:
+    """Array form of an engine's enhanced score, for blocks of messages"""
+
+    def __init__(self, engine=None):
+        np = optional_numpy()
+        if np is None:
+            raise ImportError("MessageScorer needs numpy")
+        self.engine = engine if engine is not None else CaesarEngine()
+
+        # chi_squared[n, s - 1] = sum_j pct[n, j]^2 / e[(j - s) % 26] - 2 pct[n, j] + e[(j - s) % 26],
+        # taken over the letters with a nonzero expected frequency e
+        expected = np.array([self.engine.english_freq[letter] for letter in string.ascii_uppercase])
+        present = expected > 0
+        inverse = np.divide(1.0, expected, out=np.zeros_like(expected), where=present)
+        plain = (np.arange(26)[:, None] - np.arange(1, 26)[None, :]) % 26
+        self._letter_weights = inverse[plain]
+        self._present_weights = present[plain].astype(np.float64)
+        self._expected_sum = expected[present].sum()
+
+        self._digram_layers = self._pattern_layers(np, self.engine.shifted_digrams, 2, 2)
+        self._trigram_layers = self._pattern_layers(np, self.engine.shifted_trigrams, 3, 3)
+
+    @staticmethod
+    def _pattern_layers(np, shifted, n, weight):
+        """(shift, bonus) lookup tables over base-27 n-gram indexes
+
+        Counting in base 27 lets padding be a digit of its own, so an n-gram
+        running into padding never aliases a real one. An n-gram that is a
+        common pattern under several shifts gets an entry in several layers.
+        """
+        def base27(index):
+            digits = 0
+            for power in range(n):
+                index, digit = divmod(index, 26)
+                digits += digit * 27 ** power
+            return digits
+
+        layers = []
+        for shift in range(1, 26):
+            for index in shifted[shift]:
+                index = base27(index)
+                for shifts, bonuses in layers:
+                    if not bonuses[index]:
+                        break
+                else:
+                    shifts, bonuses = np.zeros(27 ** n, dtype=np.int32), np.zeros(27 ** n)
+                    layers.append((shifts, bonuses))
+                shifts[index] = shift - 1
+                bonuses[index] = weight
+        return layers
+
+    def encode(self, messages):
+        """(padded letter-index matrix, letters per message) of ASCII messages"""
+        np = optional_numpy()
+        data = [message.encode('ascii') for message in messages]
+        lengths = np.fromiter(map(len, data), dtype=np.int64, count=len(data))
+        upper = np.frombuffer(b''.join(data), dtype=np.uint8) & 0xDF
+        is_letter = (upper >= 65) & (upper <= 90)
+        rows = np.repeat(np.arange(len(data)), lengths)[is_letter]
+        letters = np.bincount(rows, minlength=len(data))
+        # Position of each letter within its own message
+        starts = np.cumsum(letters) - letters
+        positions = np.arange(len(rows)) - starts[rows]
+        matrix = np.full((len(data), max(int(letters.max(initial=0)), 1)), PAD, dtype=np.uint8)
+        matrix[rows, positions] = upper[is_letter] - 65
+        return matrix, letters
+
+    def _pattern_score(self, np, grams, layers):
+        """Bonus per message and shift from an (n x positions) array of base-27 n-gram indexes"""
+        count = len(grams)
+        # Most positions hold no common pattern under any shift; only the rest are binned
+        rows, positions = np.nonzero(layers[0][1][grams])
+        found = grams[rows, positions]
+        cells = rows * 25
+        bonus = np.zeros(count * 25)
+        for shifts, bonuses in layers:
+            bonus += np.bincount(cells + shifts[found], weights=bonuses[found], minlength=count * 25)
+        return bonus.reshape(count, 25)
+
+    def score_matrix(self, matrix, letters):
+        """(messages x 25) scores for shifts 1-25, lower is better"""
+        np = optional_numpy()
+        count, width = matrix.shape
+        # int32 halves the memory traffic of intp
+        codes = matrix.astype(np.int32)
+
+        cells = codes + np.arange(count, dtype=np.int32)[:, None] * 27
+        letter_counts = np.bincount(cells.ravel(), minlength=count * 27).reshape(count, 27)[:, :26]
+        pct = letter_counts * (100.0 / np.maximum(letters, 1))[:, None]
+        scores = (pct ** 2) @ self._letter_weights - 2 * pct @ self._present_weights + self._expected_sum
+
+        if width >= 2:
+            digrams = codes[:, :-1] * 27 + codes[:, 1:]
+            scores -= self._pattern_score(np, digrams, self._digram_layers)
+        if width >= 3:
+            trigrams = digrams[:, :-1] * 27 + codes[:, 2:]
+            scores -= self._pattern_score(np, trigrams, self._trigram_layers)
+        return scores
+
+    def best_shifts(self, messages):
+        """(shifts, scores) arrays with the best shift 1-25 of every message"""
+        np = optional_numpy()
+        messages = list(messages)
+        shifts = np.zeros(len(messages), dtype=np.int64)
+        scores = np.zeros(len(messages), dtype=np.float64)
+
+        batched = []
+        for i, message in enumerate(messages):
+            if message.isascii() and len(message) <= MAX_BATCH_CHARS:
+                batched.append(i)
+            else:
+                shifts[i], scores[i] = best_single(self.engine, message)
+        # Blocks of similar length waste little of the matrix on padding
+        batched.sort(key=lambda i: len(messages[i]))
+
+        for start in range(0, len(batched), BLOCK_MESSAGES):
+            block = batched[start:start + BLOCK_MESSAGES]
+            block_scores = self.score_matrix(*self.encode([messages[i] for i in block]))
+            best = block_scores.argmin(axis=1)
+            shifts[block] = best + 1
+            scores[block] = block_scores[np.arange(len(block)), best]
+        return shifts, scores
+
+
+def best_single(engine, message):
+    """Best (shift, score) of one message by engine.score_counts"""
+    counts = engine.count_ngrams(message)
+    return min(((shift, engine.score_counts(counts, shift)) for shift in range(1, 26)), key=lambda x: x[1])
+
+
+def best_shifts(messages, engine=None):
+    """(shifts, scores) with the enhanced scorer's best shift for every message
+
+    The engine's MessageScorer is built on its first call and reused, so
+    repeated calls with the same engine pay for the scoring tables once.
+    Returns numpy arrays, or lists when numpy is not installed.
+    """
+    if engine is None:
+        engine = shared_engine()
+
+    if optional_numpy() is None:
+        results = [best_single(engine, message) for message in messages]
+        return [shift for shift, score in results], [score for shift, score in results]
+    return engine.message_scorer().best_shifts(messages)
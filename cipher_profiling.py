@@ -0,0 +1,137 @@
+"""Lightweight per-stage timing registry
+
+Wrap a stage in `with stage('decrypt'):` to record its call count,
+cumulative time and recent latencies. Profiling is off unless the
+CEASECIPHER_PROFILE environment variable is set to something other than
+an off value like 0 or 'off' (see cipher_history.OFF_VALUES), or
+PROFILER.enabled is switched on; while off, stage() hands back a shared no-op context manager
+and records nothing.
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from cipher_history import is_off
+
+ENV_VAR = 'CEASECIPHER_PROFILE'
+
+# Recent latencies kept per stage for percentiles
+SAMPLES_PER_STAGE = 512
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class _NullStage:
+    """Context manager that does nothing, shared by every disabled stage"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageStats:
+    """Call count, cumulative time and a window of recent latencies of one stage"""
+    __slots__ = ('count', 'total', 'max', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SAMPLES_PER_STAGE)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1e3,
+            'mean_ms': self.total / self.count * 1e3,
+            'p50_ms': percentile(ordered, 0.50) * 1e3,
+            'p95_ms': percentile(ordered, 0.95) * 1e3,
+            'max_ms': self.max * 1e3
+        }
+
+
+class StageProfiler:
+    """Registry of StageStats by stage name"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        """Context manager timing one run of a stage"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name, seconds):
+        """Add one timing for a stage"""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = StageStats()
+            stats.count += 1
+            stats.total += seconds
+            stats.samples.append(seconds)
+            if seconds > stats.max:
+                stats.max = seconds
+
+    def snapshot(self):
+        """Stage name -> summary dict, most expensive stages first"""
+        with self._lock:
+            summaries = {name: stats.summary() for name, stats in self._stats.items()}
+        return dict(sorted(summaries.items(), key=lambda x: x[1]['total_ms'], reverse=True))
+
+    def format_summary(self, limit=6):
+        """One line of the costliest stages for a status display"""
+        return " | ".join(f"{name} {s['mean_ms']:.1f}ms x{s['count']}"
+                          for name, s in list(self.snapshot().items())[:limit])
+
+    def dump(self, path):
+        """Write the snapshot as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'enabled': self.enabled, 'stages': self.snapshot()}, f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def env_enabled():
+    """Whether ENV_VAR turns profiling on"""
+    value = os.environ.get(ENV_VAR)
+    return value is not None and not is_off(value)
+
+
+PROFILER = StageProfiler(enabled=env_enabled())
+
+stage = PROFILER.stage
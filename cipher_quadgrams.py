@@ -0,0 +1,209 @@
+"""English quadgram log-likelihood scorer backed by a memory-mapped binary model
+
+The model file is a raw little-endian float32 array of 26**4 log10
+probabilities indexed like cipher_core.ngram_index, so it can be mapped
+straight into memory without parsing. Build it with:
+
+    python cipher_quadgrams.py build corpus1.txt corpus2.txt ...
+
+The bundled data/english_quadgrams.bin (761,263 quadgrams) is rebuilt
+byte for byte from these files, given in this order:
+
+    Isaac.Newton-Opticks.txt  Go 1.21.6 src/testdata (Project Gutenberg transcription)
+                              sha256 d4a9ac22462b35e7821a4f2706c211093da678620a8f9997989ee7cf8d507bbd
+    gettysburg.txt            Go 1.21.6 src/compress/testdata
+                              sha256 40878db5ff73f384fc64e02bac26a80371fb4fe83acac5ebe390a54280582aee
+    pydoc_data/topics.py      CPython 3.11.7 standard library
+                              sha256 abaa56a64551d8eead1b19cbae3c6db443f99f0cab81df07bed3cb75c0db9346
+
+    python cipher_quadgrams.py build Isaac.Newton-Opticks.txt gettysburg.txt topics.py
+
+Only the first two are public-domain prose. topics.py is Python reference
+documentation under the PSF License Agreement (Copyright Python Software
+Foundation), and supplies about 40% of the quadgrams. The table holds only
+aggregate quadgram frequencies, not text, but a model that must derive from
+public-domain text alone has to be rebuilt without it.
+
+The model is binary (see .gitattributes); end-of-line conversion on
+checkout would corrupt it.
+"""
+import argparse
+import array
+import math
+import mmap
+import os
+import sys
+import time
+from collections import Counter
+
+from cipher_core import SAMPLE_TEXTS, optional_numpy, caesar_encrypt, letter_sequence, ngram_index
+
+QUADGRAM_COUNT = 26 ** 4
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'english_quadgrams.bin')
+
+# Scores are -100 x the mean log10 probability per quadgram, so lower is
+# better like calculate_enhanced_score and typical gaps are in the hundreds
+SCORE_SCALE = 100
+
+# Digit weights of a quadgram index, most significant first
+_WEIGHTS = (26 ** 3, 26 ** 2, 26, 1)
+
+
+def build_model(corpus_paths, output_path=DEFAULT_MODEL_PATH):
+    """Count quadgrams over corpus files and write the log10 probability table"""
+    counts = [0] * QUADGRAM_COUNT
+    for path in corpus_paths:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            letters = letter_sequence(f.read())
+        for gram, count in Counter(letters[i:i+4] for i in range(len(letters) - 3)).items():
+            index = ngram_index(gram)
+            if index is not None:
+                counts[index] += count
+
+    total = sum(counts)
+    if not total:
+        raise ValueError("Corpus contains no quadgrams")
+
+    # Unseen quadgrams get a fixed floor well below any observed probability
+    floor = math.log10(0.01 / total)
+    table = array.array('f', (math.log10(c / total) if c else floor for c in counts))
+    if sys.byteorder != 'little':
+        table.byteswap()
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'wb') as f:
+        table.tofile(f)
+    return total
+
+
+class QuadgramModel:
+    """Memory-mapped quadgram log-probability table"""
+
+    def __init__(self, path=DEFAULT_MODEL_PATH):
+        start = time.perf_counter()
+        size = os.path.getsize(path)
+        if size != QUADGRAM_COUNT * 4:
+            raise ValueError(f"{path} is not a quadgram model ({size} bytes)")
+
+        self.path = path
+        np = optional_numpy()
+        if np is not None:
+            self.log_probs = np.memmap(path, dtype='<f4', mode='r')
+        else:
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.log_probs = memoryview(self._mmap).cast('f')
+        self.load_seconds = time.perf_counter() - start
+
+    def score(self, text):
+        """Score one candidate plaintext (lower is better)"""
+        return self.score_shifts(text, shifts=(0,))[0][1]
+
+    def score_shifts(self, text, shifts=range(1, 26)):
+        """Score text decoded with each shift in one pass over its letters
+
+        The ciphertext's distinct quadgrams are counted once; each shift then
+        only remaps those indices into the table.
+        """
+        total, log_likelihoods = self.tally(letter_sequence(text), shifts)
+        return self.tally_scores(total, log_likelihoods, shifts)
+
+    @staticmethod
+    def tally_scores(total, log_likelihoods, shifts=range(1, 26)):
+        """(shift, score) pairs from a quadgram count and per-shift log-likelihoods"""
+        return [(shift, -SCORE_SCALE * log_likelihood / total if total else 0.0)
+                for shift, log_likelihood in zip(shifts, log_likelihoods)]
+
+    def tally(self, letters, shifts=range(1, 26)):
+        """(quadgram count, [log-likelihood per shift]) of a letter_sequence string
+
+        Tallies of consecutive pieces add up when each piece starts with the
+        last three letters of the one before.
+        """
+        np = optional_numpy()
+        if np is not None:
+            return self._tally_numpy(np, letters, shifts)
+
+        grams = Counter(letters[i:i+4] for i in range(len(letters) - 3))
+        total = sum(count for gram, count in grams.items() if ngram_index(gram) is not None)
+        log_likelihoods = []
+        for shift in shifts:
+            log_likelihood = 0.0
+            for gram, count in grams.items():
+                index = ngram_index(caesar_encrypt(gram, -shift))
+                if index is not None:
+                    log_likelihood += self.log_probs[index] * count
+            log_likelihoods.append(log_likelihood)
+        return total, log_likelihoods
+
+    def _tally_numpy(self, np, letters, shifts):
+        codes = np.frombuffer(letters.encode('ascii', 'replace'), dtype=np.uint8).astype(np.int64) - 65
+        span = len(codes) - 3
+        if span <= 0:
+            return 0, [0.0 for shift in shifts]
+
+        digits = [codes[k:span + k] for k in range(4)]
+        ok = np.ones(span, dtype=bool)
+        for d in digits:
+            ok &= (d >= 0) & (d < 26)
+        index = sum(d[ok] * w for d, w in zip(digits, _WEIGHTS))
+        unique, counts = np.unique(index, return_counts=True)
+        total = int(counts.sum())
+        if not total:
+            return 0, [0.0 for shift in shifts]
+
+        unique_digits = [(unique // w) % 26 for w in _WEIGHTS]
+        log_likelihoods = []
+        for shift in shifts:
+            plain = sum(((d - shift) % 26) * w for d, w in zip(unique_digits, _WEIGHTS))
+            log_likelihoods.append(float(np.dot(self.log_probs[plain], counts)))
+        return total, log_likelihoods
+
+
+# Loaded on first use and shared by every engine in the process
+_DEFAULT_MODEL = []
+
+
+def default_model():
+    """The bundled English model, memory-mapped once per process"""
+    if not _DEFAULT_MODEL:
+        _DEFAULT_MODEL.append(QuadgramModel())
+    return _DEFAULT_MODEL[0]
+
+
+def report_costs(model, megabytes=1):
+    """Model load time and scoring cost per MB of ciphertext"""
+    sample = ' '.join(text for name, text in SAMPLE_TEXTS)
+    text = (sample + ' ') * (megabytes * 1000000 // (len(sample) + 1) + 1)
+    start = time.perf_counter()
+    model.score_shifts(text)
+    elapsed = time.perf_counter() - start
+    return {
+        'model': model.path,
+        'load_ms': round(model.load_seconds * 1000, 3),
+        'score_25_shifts_s_per_mb': round(elapsed / (len(text) / 1e6), 4)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the quadgram model")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="build the model from English corpus files")
+    build.add_argument('corpus', nargs='+')
+    build.add_argument('-o', '--output', default=DEFAULT_MODEL_PATH)
+    info = commands.add_parser('info', help="report load time and scoring cost per MB")
+    info.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        total = build_model(args.corpus, args.output)
+        print(f"Wrote {args.output} from {total} quadgrams")
+    else:
+        for key, value in report_costs(QuadgramModel(args.model)).items():
+            print(f"{key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
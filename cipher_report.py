@@ -0,0 +1,194 @@
+"""Streaming analysis report writer
+
+Reports are written field by field straight to the output, and decoded
+texts are produced one chunk of one shift at a time, so peak memory is the
+analysis plus one chunk regardless of how many shifts or how much text.
+A TextFile input is never held whole either: it is analysed and decoded in
+chunks, re-reading the file for each shift.
+"""
+import gzip
+import json
+import sys
+from datetime import datetime
+
+from cipher_core import CaesarEngine, TextAnalysis, caesar_decrypt
+from cipher_profiling import stage
+
+REPORT_FORMATS = ('json', 'jsonl', 'text')
+
+# full: every decoded text; preview: the first preview_length characters
+DECODED_MODES = ('full', 'preview')
+
+DEFAULT_REPORT_CHUNK_SIZE = 1 << 16
+DEFAULT_PREVIEW_LENGTH = 200
+
+
+def report_format(filename):
+    """Report format implied by a file name (.json, .jsonl or text, optionally .gz)"""
+    name = filename[:-3] if filename.endswith('.gz') else filename
+    if name.endswith('.jsonl'):
+        return 'jsonl'
+    if name.endswith('.json'):
+        return 'json'
+    return 'text'
+
+
+def open_report(filename):
+    """Open a report file for writing, gzip-compressed when it ends in .gz"""
+    if filename in (None, '-'):
+        return sys.stdout
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'wt', encoding='utf-8', errors='surrogateescape')
+    return open(filename, 'w', encoding='utf-8', errors='surrogateescape')
+
+
+class TextFile:
+    """A text file read a chunk at a time, from the start, on every pass over it"""
+
+    def __init__(self, path, encoding='utf-8'):
+        self.path = path
+        self.encoding = encoding
+
+    def chunks(self, chunk_size, end=None):
+        """Successive pieces of at most chunk_size characters, up to end characters"""
+        with open(self.path, 'r', encoding=self.encoding, errors='surrogateescape') as f:
+            remaining = end
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+
+def shift_summary(analysis, shift):
+    """Scores and frequencies of one shift, without its decoded text"""
+    letter_freq, digram_freq, trigram_freq = analysis.frequency(shift)
+    return {
+        'shift': shift,
+        'quality_score': analysis.quality_scores[shift],
+        'readability_score': analysis.readability_scores[shift],
+        'word_score': analysis.word_scores[shift],
+        'letter_frequency': letter_freq,
+        'top_digrams': dict(list(digram_freq.items())[:5]),
+        'top_trigrams': dict(list(trigram_freq.items())[:5])
+    }
+
+
+class ReportWriter:
+    """Write an analysis report as JSON, JSON lines (one object per shift) or text"""
+
+    def __init__(self, out, fmt='json', decoded='full', chunk_size=DEFAULT_REPORT_CHUNK_SIZE,
+                 preview_length=DEFAULT_PREVIEW_LENGTH):
+        if fmt not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format {fmt!r}, expected one of {REPORT_FORMATS}")
+        if decoded not in DECODED_MODES:
+            raise ValueError(f"Unknown decoded mode {decoded!r}, expected one of {DECODED_MODES}")
+        self.out = out
+        self.fmt = fmt
+        self.decoded = decoded
+        self.chunk_size = chunk_size
+        self.preview_length = preview_length
+
+    def write(self, text, analysis):
+        """Stream the report for text, a str or TextFile, and its TextAnalysis"""
+        header = {
+            'timestamp': datetime.now().isoformat(),
+            'input_length': analysis.length,
+            'scorer': analysis.scorer,
+            'decoded': self.decoded
+        }
+        if self.fmt == 'text':
+            self._write_text(text, analysis, header)
+        elif self.fmt == 'jsonl':
+            self._write_jsonl(text, analysis, header)
+        else:
+            self._write_json(text, analysis, header)
+
+    def _write_json(self, text, analysis, header):
+        self._write_object_open(header)
+        self.out.write(',\n "input_text": ')
+        self._write_text_field(text, analysis, 0)
+        self.out.write(',\n "analysis": {')
+        for shift in range(1, 26):
+            self.out.write(',\n  ' if shift > 1 else '\n  ')
+            self.out.write(json.dumps(f'shift_{shift}') + ': ')
+            self._write_shift(text, analysis, shift)
+        self.out.write('\n }\n}\n')
+
+    def _write_jsonl(self, text, analysis, header):
+        self._write_object_open(header)
+        self.out.write(', "input_text": ')
+        self._write_text_field(text, analysis, 0)
+        self.out.write('}\n')
+        for shift in range(1, 26):
+            self._write_shift(text, analysis, shift)
+            self.out.write('\n')
+
+    def _write_object_open(self, fields):
+        """Write a JSON object without its closing brace, so more fields can follow"""
+        self.out.write(json.dumps(fields)[:-1])
+
+    def _write_shift(self, text, analysis, shift):
+        self._write_object_open(shift_summary(analysis, shift))
+        self.out.write(', "decoded_text": ')
+        self._write_text_field(text, analysis, shift)
+        self.out.write('}')
+
+    def _write_text_field(self, text, analysis, shift):
+        """Write text decoded with shift as a JSON string, a chunk at a time"""
+        end = analysis.length if self.decoded == 'full' else min(analysis.length, self.preview_length)
+        self.out.write('"')
+        for chunk in self._chunks(text, end):
+            # Each character escapes independently, so chunks concatenate safely
+            self.out.write(json.dumps(caesar_decrypt(chunk, shift))[1:-1])
+        self.out.write('"')
+
+    def _chunks(self, text, end):
+        if isinstance(text, TextFile):
+            return text.chunks(self.chunk_size, end)
+        return (text[start:min(end, start + self.chunk_size)] for start in range(0, end, self.chunk_size))
+
+    def _write_text(self, text, analysis, header):
+        out = self.out
+        out.write("🔐 CAESAR CIPHER ANALYSIS REPORT\n")
+        out.write(f"Generated: {header['timestamp']}\n")
+        out.write("=" * 50 + "\n\n")
+
+        out.write(f"📝 Input Text Length: {analysis.length} characters\n")
+        out.write(f"📝 Input Preview: {analysis.preview(0, 100)}...\n\n")
+
+        out.write("🏆 TOP 5 CANDIDATES:\n")
+        out.write("-" * 30 + "\n")
+
+        for i, (shift, score) in enumerate(analysis.top_candidates(5)):
+            out.write(f"\n🔑 Rank {i+1}: Shift {shift} (Score: {score:.2f})\n")
+            out.write(f"   {analysis.preview(shift, 80)}...\n")
+
+
+def write_report(engine, text, filename, decoded='full', chunk_size=DEFAULT_REPORT_CHUNK_SIZE,
+                 preview_length=DEFAULT_PREVIEW_LENGTH, counts=None, fmt=None):
+    """Analyse text, a str or TextFile, and stream its report to filename; the format follows the extension"""
+    with stage('report_analysis'):
+        if isinstance(text, TextFile):
+            analysis = TextAnalysis.from_chunks(engine, text.chunks(chunk_size))
+        else:
+            analysis = engine.analyze(text, counts)
+    writer_format = fmt or report_format(filename or '')
+    out = open_report(filename)
+    try:
+        with stage('report_write'):
+            ReportWriter(out, writer_format, decoded, chunk_size, preview_length).write(text, analysis)
+    finally:
+        if out is sys.stdout:
+            out.flush()
+        else:
+            out.close()
+
+
+def run_report(args):
+    """Entry point for `ceasecipher report`"""
+    write_report(CaesarEngine(args.scorer), TextFile(args.input, args.encoding), args.output, args.decoded,
+                 args.chunk_size, args.preview_length, fmt=args.format)
+    return 0
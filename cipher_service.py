@@ -0,0 +1,355 @@
+"""Local asyncio HTTP service for the decoding engine
+
+Endpoints take and return JSON:
+
+    POST /decode  {"text": ..., "shift": 3}   decode and score like Quick Decode
+    POST /detect  {"text": ...}               best shift like Smart Guess
+    POST /report  {"text": ..., "decoded": "preview"}
+    GET  /stats                               request, batch and rejection counters
+
+Requests that arrive together are coalesced into batches and scored in a
+process pool. Once max_pending requests are waiting, new ones are refused
+with 503 so clients back off instead of queueing without bound. A load
+generator is bundled:
+
+    python cipher_service.py loadgen --concurrency 32 --requests 5000
+"""
+import argparse
+import asyncio
+import io
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cipher_core import SAMPLE_TEXTS, caesar_decrypt, shared_engine
+from cipher_profiling import percentile
+from cipher_report import ReportWriter
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_BATCH_WINDOW = 0.002
+DEFAULT_MAX_PENDING = 1024
+DEFAULT_MAX_BODY = 8 << 20
+
+ENDPOINTS = ('/decode', '/detect', '/report')
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+def handle_job(path, request):
+    """Run one request body against the engine; returns (status, JSON text)"""
+    try:
+        text = request['text']
+        if not isinstance(text, str):
+            raise TypeError("'text' must be a string")
+        engine = shared_engine(request.get('scorer', 'enhanced'))
+
+        if path == '/decode':
+            shift = int(request['shift'])
+            return 200, json.dumps({
+                'shift': shift,
+                'decoded': caesar_decrypt(text, shift),
+                'score': engine.score_counts(engine.count_ngrams(text), shift)
+            })
+
+        if path == '/detect':
+            shift, score = engine.intelligent_guess(text)
+            return 200, json.dumps({'shift': shift, 'score': score, 'decoded': caesar_decrypt(text, shift)})
+
+        out = io.StringIO()
+        ReportWriter(out, 'json', request.get('decoded', 'preview')).write(text, engine.analyze(text))
+        return 200, out.getvalue()
+    except KeyError as e:
+        return 400, json.dumps({'error': f"missing field {e}"})
+    except (TypeError, ValueError, OverflowError) as e:
+        return 400, json.dumps({'error': str(e)})
+    except Exception as e:
+        # Fails this job only; the rest of its batch is still answered
+        return 500, json.dumps({'error': f"{type(e).__name__}: {e}"})
+
+
+def handle_batch(jobs):
+    """Worker entry point: run a batch of (path, request) jobs
+
+    handle_job turns every error into its own job's response, so one bad
+    request never fails the requests batched with it.
+    """
+    return [handle_job(path, request) for path, request in jobs]
+
+
+class Overloaded(Exception):
+    """Raised when too many requests are already waiting"""
+
+
+class RequestBatcher:
+    """Coalesce concurrent jobs into batches run on an executor
+
+    A batch is flushed when it reaches batch_size or batch_window seconds
+    after its first job, whichever comes first.
+    """
+
+    def __init__(self, executor, batch_size=DEFAULT_BATCH_SIZE, batch_window=DEFAULT_BATCH_WINDOW,
+                 max_pending=DEFAULT_MAX_PENDING):
+        self.executor = executor
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.pending = 0
+        self.batches = 0
+        self.jobs = 0
+        self._queue = []
+        self._timer = None
+
+    async def submit(self, job):
+        if self.pending >= self.max_pending:
+            raise Overloaded()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((job, future))
+        self.pending += 1
+        if len(self._queue) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_window, self._flush)
+        try:
+            return await future
+        finally:
+            self.pending -= 1
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._queue = self._queue, []
+        if not batch:
+            return
+        self.batches += 1
+        self.jobs += len(batch)
+        futures = [future for job, future in batch]
+        done = asyncio.get_running_loop().run_in_executor(self.executor, handle_batch, [job for job, future in batch])
+        done.add_done_callback(lambda result: self._deliver(futures, result))
+
+    @staticmethod
+    def _deliver(futures, result):
+        error = result.exception()
+        for index, future in enumerate(futures):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result.result()[index])
+
+
+class DecodeService:
+    """HTTP/1.1 front end with keep-alive over a RequestBatcher"""
+
+    def __init__(self, batcher, max_body=DEFAULT_MAX_BODY):
+        self.batcher = batcher
+        self.max_body = max_body
+        self.started = time.monotonic()
+        self.requests = 0
+        self.rejected = 0
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                keep_alive = await self._handle_request(head, reader, writer)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # A dropped connection, or a body shorter than its Content-Length
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, head, reader, writer):
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, path, version = lines[0].split(' ', 2)
+        except ValueError:
+            self._respond(writer, 400, json.dumps({'error': 'malformed request line'}), False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            self._respond(writer, 400, json.dumps({'error': 'bad Content-Length'}), False)
+            return False
+        if length > self.max_body:
+            self._respond(writer, 413, json.dumps({'error': f'body over {self.max_body} bytes'}), False)
+            return False
+        body = await reader.readexactly(length) if length else b''
+
+        self.requests += 1
+        status, payload = await self._dispatch(method, path, body)
+        self._respond(writer, status, payload, keep_alive)
+        return keep_alive
+
+    async def _dispatch(self, method, path, body):
+        if path == '/stats' and method == 'GET':
+            return 200, json.dumps(self.stats())
+        if path not in ENDPOINTS:
+            return 404, json.dumps({'error': f'no endpoint {path}'})
+        if method != 'POST':
+            return 405, json.dumps({'error': 'use POST'})
+        try:
+            request = json.loads(body)
+            if not isinstance(request, dict):
+                raise ValueError("body must be a JSON object")
+        except ValueError as e:
+            return 400, json.dumps({'error': str(e)})
+        try:
+            return await self.batcher.submit((path, request))
+        except Overloaded:
+            self.rejected += 1
+            return 503, json.dumps({'error': 'overloaded, retry later'})
+        except Exception as e:
+            return 500, json.dumps({'error': str(e)})
+
+    def _respond(self, writer, status, payload, keep_alive):
+        body = payload.encode('utf-8', 'surrogateescape')
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n")
+        if status == 503:
+            head += "Retry-After: 1\r\n"
+        writer.write(head.encode('latin-1') + b'\r\n' + body)
+
+    def stats(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            'requests': self.requests,
+            'requests_per_s': self.requests / elapsed,
+            'rejected': self.rejected,
+            'pending': self.batcher.pending,
+            'batches': self.batcher.batches,
+            'mean_batch_size': self.batcher.jobs / self.batcher.batches if self.batcher.batches else 0
+        }
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, workers=None,
+                batch_size=DEFAULT_BATCH_SIZE, batch_window=DEFAULT_BATCH_WINDOW,
+                max_pending=DEFAULT_MAX_PENDING, max_body=DEFAULT_MAX_BODY):
+    """Run the service until cancelled; workers=0 scores on a thread instead of processes"""
+    executor = ThreadPoolExecutor(max_workers=1) if workers == 0 else ProcessPoolExecutor(max_workers=workers)
+    service = DecodeService(RequestBatcher(executor, batch_size, batch_window, max_pending), max_body)
+    limit = max_body + (64 << 10)
+    if unix_path:
+        server = await asyncio.start_unix_server(service.handle_connection, unix_path, limit=limit)
+    else:
+        server = await asyncio.start_server(service.handle_connection, host, port, limit=limit)
+    where = unix_path or f"http://{host}:{port}"
+    print(f"Serving {', '.join(ENDPOINTS)} on {where}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def run_serve(args):
+    """Entry point for `ceasecipher serve`"""
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers, args.batch_size,
+                          args.batch_window_ms / 1000, args.max_pending, args.max_body))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def add_serve_arguments(parser):
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="scoring processes (default: CPU count, 0 for a thread)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="most requests per batch")
+    parser.add_argument('--batch-window-ms', type=float, default=DEFAULT_BATCH_WINDOW * 1000,
+                        help="how long a batch waits for more requests")
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help="waiting requests before new ones get 503")
+    parser.add_argument('--max-body', type=int, default=DEFAULT_MAX_BODY, help="largest request body in bytes")
+
+
+async def _load_client(host, port, path, bodies, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+            head = await reader.readuntil(b'\r\n\r\n')
+            status = int(head.split(b' ', 2)[1])
+            length = 0
+            for line in head.split(b'\r\n'):
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':', 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def load_test(host=DEFAULT_HOST, port=DEFAULT_PORT, path='/detect', concurrency=32, requests=2000):
+    """Drive the service with sample ciphertexts over keep-alive connections"""
+    samples = [json.dumps({'text': text, 'shift': 3}).encode('utf-8') for name, text in SAMPLE_TEXTS]
+    per_client = [[samples[(client + i) % len(samples)] for i in range(client, requests, concurrency)]
+                  for client in range(concurrency)]
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(_load_client(host, port, path, bodies, latencies, statuses)
+                           for bodies in per_client if bodies))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'requests_per_s': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1e3,
+        'p99_ms': percentile(latencies, 0.99) * 1e3,
+        'statuses': statuses
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local decode service and its load generator")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help="run the service")
+    add_serve_arguments(serve_parser)
+    load = commands.add_parser('loadgen', help="measure requests/s against a running service")
+    load.add_argument('--host', default=DEFAULT_HOST)
+    load.add_argument('--port', type=int, default=DEFAULT_PORT)
+    load.add_argument('--endpoint', choices=ENDPOINTS, default='/detect')
+    load.add_argument('-c', '--concurrency', type=int, default=32, help="simultaneous connections")
+    load.add_argument('-n', '--requests', type=int, default=2000, help="total requests")
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        return run_serve(args)
+    result = asyncio.run(load_test(args.host, args.port, args.endpoint, args.concurrency, args.requests))
+    print(f"{result['requests']} requests in {result['seconds']:.2f}s: {result['requests_per_s']:.1f} req/s, "
+          f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, statuses {result['statuses']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
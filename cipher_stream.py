@@ -0,0 +1,159 @@
+"""Constant-memory streaming decode for files and pipes
+
+Inputs in an ASCII-compatible encoding are streamed as raw bytes: chunks
+are read into one reused buffer and shifted with bytes.translate, with no
+decoding to str. Shifting bytes is exact there because every byte below
+0x80 is the ASCII character; other encodings go through text streams.
+"""
+import codecs
+import io
+import sys
+
+from cipher_core import CaesarEngine, ProgressiveDetector, caesar_decrypt
+
+# Characters read per chunk when streaming
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# Most letters auto mode reads before committing to a shift
+DEFAULT_SAMPLE_LETTERS = 1 << 14
+
+# Canonical codecs names of the encodings streamed as raw bytes
+ASCII_COMPATIBLE_ENCODINGS = ('utf-8', 'ascii', 'iso8859-1', 'cp1252')
+
+
+def stream_decode(src, dst, shift=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                  sample_letters=DEFAULT_SAMPLE_LETTERS, engine=None, detector=None):
+    """Decode src into dst chunk by chunk; with shift=None pick it from a leading sample
+
+    The sample grows a chunk at a time until the detector is confident or
+    sample_letters is reached, so only it is ever held in memory. Returns
+    the shift that was used.
+    """
+    pending = []
+    if shift is None:
+        engine = engine or CaesarEngine()
+        detector = detector or ProgressiveDetector(engine.english_freq)
+        while detector.total_letters < sample_letters:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            pending.append(chunk)
+            detector.add(chunk)
+            if detector.confident:
+                break
+        sample = ''.join(pending)
+        shift = min(engine.score_shifts(sample), key=lambda x: x[1])[0] if detector.total_letters else 0
+        pending = [sample]
+
+    for chunk in pending:
+        dst.write(caesar_decrypt(chunk, shift))
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        dst.write(caesar_decrypt(chunk, shift))
+    dst.flush()
+    return shift
+
+
+def stream_decode_bytes(src, dst, shift=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                        sample_letters=DEFAULT_SAMPLE_LETTERS, engine=None, detector=None):
+    """stream_decode for binary streams, reading every chunk into the same preallocated buffer
+
+    The sample is counted as bytes; a sample that is not pure ASCII is
+    decoded as UTF-8 and counted like text.
+    """
+    buffer = bytearray(chunk_size)
+
+    def read_chunk():
+        size = src.readinto(buffer)
+        return buffer if size == chunk_size else buffer[:size]
+
+    pending = []
+    if shift is None:
+        engine = engine or CaesarEngine()
+        detector = detector or ProgressiveDetector(engine.english_freq)
+        while detector.total_letters < sample_letters:
+            chunk = read_chunk()
+            if not chunk:
+                break
+            pending.append(bytes(chunk))
+            detector.add(pending[-1])
+            if detector.confident:
+                break
+        sample = b''.join(pending)
+        shift = min(engine.score_shifts(sample), key=lambda x: x[1])[0] if detector.total_letters else 0
+        pending = [sample]
+
+    for chunk in pending:
+        dst.write(caesar_decrypt(chunk, shift))
+    while True:
+        chunk = read_chunk()
+        if not chunk:
+            break
+        dst.write(caesar_decrypt(chunk, shift))
+    dst.flush()
+    return shift
+
+
+def ascii_compatible(encoding):
+    """Whether text in encoding can be shifted as raw bytes"""
+    try:
+        return codecs.lookup(encoding).name in ASCII_COMPATIBLE_ENCODINGS
+    except LookupError:
+        return False
+
+
+def open_binary_stream(path, mode):
+    """Open a file, or stdin/stdout for '-', as a binary stream"""
+    if path in (None, '-'):
+        return sys.stdin.buffer if 'r' in mode else sys.stdout.buffer
+    return open(path, mode)
+
+
+def close_binary_stream(stream, path):
+    """Close a stream from open_binary_stream without closing stdin/stdout"""
+    if path not in (None, '-'):
+        stream.close()
+
+
+def open_text_stream(path, mode, encoding='utf-8'):
+    """Open a file, or stdin/stdout for '-', as a text stream that keeps line endings"""
+    if path in (None, '-'):
+        raw = sys.stdin.buffer if 'r' in mode else sys.stdout.buffer
+        return io.TextIOWrapper(raw, encoding=encoding, errors='surrogateescape', newline='')
+    return open(path, mode, encoding=encoding, errors='surrogateescape', newline='')
+
+
+def close_text_stream(stream, path):
+    """Close a stream from open_text_stream without closing stdin/stdout"""
+    if path in (None, '-'):
+        stream.detach()
+    else:
+        stream.close()
+
+
+def run_decode(args):
+    """Entry point for `ceasecipher decode`"""
+    engine = CaesarEngine(args.scorer)
+    detector = ProgressiveDetector(engine.english_freq, args.confidence)
+    if ascii_compatible(args.encoding):
+        decode, open_stream, close_stream = stream_decode_bytes, open_binary_stream, close_binary_stream
+        src = open_stream(args.input, 'rb')
+        dst = open_stream(args.output, 'wb')
+    else:
+        decode, close_stream = stream_decode, close_text_stream
+        src = open_text_stream(args.input, 'r', args.encoding)
+        dst = open_text_stream(args.output, 'w', args.encoding)
+    try:
+        shift = decode(src, dst, None if args.auto else args.shift, args.chunk_size,
+                       engine=engine, detector=detector)
+    finally:
+        close_stream(src, args.input)
+        close_stream(dst, args.output)
+    if args.auto and not detector.total_letters:
+        print("No letters in the input; output left unshifted", file=sys.stderr)
+    elif args.auto:
+        print(f"Detected shift: {shift} (confidence {detector.probability(shift):.4%} "
+              f"after {detector.chars} characters)", file=sys.stderr)
+    return 0
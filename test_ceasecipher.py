@@ -0,0 +1,95 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from ceasecipher import LiveAnalysisScheduler, main
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ceasecipher.py')
+
+
+class FakeRoot:
+    """Just enough of Tk's after() for the scheduler, with callbacks run by hand"""
+
+    def __init__(self):
+        self.callbacks = {}
+        self.next_id = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.callbacks[self.next_id] = callback
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.callbacks.pop(after_id, None)
+
+    def run_pending(self):
+        callbacks, self.callbacks = self.callbacks, {}
+        for callback in callbacks.values():
+            callback()
+
+
+@pytest.mark.parametrize('argv', [
+    ['decode', '--shift', '3', '--chunk-size', '0'],
+    ['report', 'secret.txt', '--chunk-size', '-5'],
+    ['crack', '.', '--workers', '0'],
+    ['decode', '--shift', '3', '/nonexistent/secret.txt'],
+    ['report', '/nonexistent/secret.txt'],
+    ['detect', '/nonexistent/secret.txt'],
+    ['crack', '.', '--wordlist', '/nonexistent/words.txt', '--workers', '1'],
+])
+def test_bad_arguments_and_missing_files_are_usage_errors(argv, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(SystemExit) as exit_info:
+        main(argv)
+    assert exit_info.value.code == 2
+    assert 'error:' in capsys.readouterr().err
+
+
+def test_clearing_the_text_mid_job_stops_polling():
+    root = FakeRoot()
+    started, release = threading.Event(), threading.Event()
+    texts = ['KHOOR']
+    applied = []
+
+    def compute(text):
+        started.set()
+        release.wait(5)
+        return text
+
+    scheduler = LiveAnalysisScheduler(root, lambda: (texts[0],) if texts[0] else None, compute, applied.append)
+    scheduler.schedule()
+    root.run_pending()
+    assert started.wait(5)
+
+    # The text is cleared while the job is still computing
+    texts[0] = ''
+    scheduler.schedule()
+    root.run_pending()
+    release.set()
+    time.sleep(0.05)
+    for _ in range(10):
+        root.run_pending()
+    assert not root.callbacks and applied == []
+
+    # The next edit is analysed as usual
+    texts[0] = 'WORLD'
+    scheduler.schedule()
+    deadline = time.monotonic() + 5
+    while not applied and time.monotonic() < deadline:
+        root.run_pending()
+        time.sleep(0.01)
+    assert applied == ['WORLD']
+
+
+@pytest.mark.parametrize('data', [b'', b'1234', b'12 34\n'])
+@pytest.mark.parametrize('encoding', ['utf-8', 'utf-16'])
+def test_auto_decode_of_input_without_letters(data, encoding):
+    completed = subprocess.run([sys.executable, SCRIPT, 'decode', '--auto', '--encoding', encoding],
+                               input=data.decode('ascii').encode(encoding), capture_output=True)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.decode(encoding) == data.decode('ascii')
+    assert b'No letters in the input' in completed.stderr
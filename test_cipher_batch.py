@@ -0,0 +1,12 @@
+from cipher_batch import crack_file
+from cipher_core import SAMPLE_TEXTS
+
+
+def test_crack_file_counts_bytes_on_disk_and_keeps_line_endings(tmp_path):
+    path = tmp_path / 'secret.txt'
+    data = SAMPLE_TEXTS[0][1].replace('. ', '.\r\n', 1).replace(' ', '\r', 1).encode('utf-8')
+    path.write_bytes(data)
+    result = crack_file(str(path), preview_length=len(data))
+    assert result['bytes'] == len(data)
+    assert result['shift'] == 3
+    assert result['preview'].startswith('THE\rQUICK') and '.\r\n' in result['preview']
@@ -0,0 +1,139 @@
+import random
+import string
+from collections import Counter
+
+import pytest
+
+import cipher_core
+from cipher_core import CaesarEngine, IncrementalStats, TextAnalysis, TextTally, as_list, caesar_encrypt, shared_engine
+
+ALPHABET = string.ascii_letters + '  ,.\n' + 'éß'
+
+
+def random_text(rng, length):
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def as_lists(counts):
+    return tuple(list(part) if not isinstance(part, int) else part for part in counts)
+
+
+def apply_edit(stats, text, start, end, new):
+    """Edit text[start:end] -> new through stats the way the input widget proxy does"""
+    before = text[:start]
+    after = text[end:]
+    stats.replace(before[-64:] if IncrementalStats.has_context(before[-64:]) else before, text[start:end], new,
+                  after[:64] if IncrementalStats.has_context(after[:64]) else after)
+    return before + new + after
+
+
+@pytest.mark.parametrize('length', [0, 40, IncrementalStats.BULK_LETTERS * 3])
+def test_incremental_stats_match_full_recount(length):
+    rng = random.Random(length)
+    engine = CaesarEngine()
+    text = random_text(rng, length)
+    stats = IncrementalStats(text)
+    assert as_lists(stats.counts()) == as_lists(engine.count_ngrams(text))
+
+    # Small edits take the per-letter path, pastes and cuts the whole-table path
+    for size in [1, 3, 20, IncrementalStats.BULK_LETTERS * 2] * 5:
+        start = rng.randint(0, len(text))
+        end = min(len(text), start + rng.choice([0, size]))
+        text = apply_edit(stats, text, start, end, random_text(rng, rng.choice([0, size])))
+        assert as_lists(stats.counts()) == as_lists(engine.count_ngrams(text))
+
+
+def test_incremental_stats_snapshot_is_a_copy():
+    stats = IncrementalStats('HELLO WORLD')
+    snapshot = stats.snapshot()
+    stats.replace('', 'HELLO WORLD', '', '')
+    assert stats.counts()[0] == 0
+    assert snapshot[0] == 10 and sum(snapshot[1]) == 10
+
+
+def test_score_tokens_match_per_candidate_scores():
+    rng = random.Random(7)
+    engine = CaesarEngine()
+    words = sorted(engine.common_words) + ['XYZZY', 'A', 'Über', 'x' * 20, '--', 'thé']
+    text = ' '.join(caesar_encrypt(rng.choice(words), 11) for _ in range(300))
+    readability, word_scores = engine.score_tokens(Counter(text.split()))
+    for shift in range(1, 26):
+        candidate = engine.caesar_decrypt(text, shift)
+        assert readability == engine.calculate_readability(candidate)
+        assert word_scores[shift] == engine.calculate_word_score(candidate)
+
+
+def test_score_tokens_of_empty_text():
+    engine = CaesarEngine()
+    readability, word_scores = engine.score_tokens(Counter())
+    assert readability == engine.calculate_readability('')
+    assert all(score == engine.calculate_word_score('') for score in word_scores.values())
+
+
+def test_text_analysis_matches_scoring_each_candidate():
+    engine = CaesarEngine()
+    engine.set_wordlist(['HELLO', 'WORLD', 'ÉTÉ', 'A'])
+    text = caesar_encrypt("Hello world, a fine été. HELLO again", 4)
+    analysis = engine.analyze(text)
+    for shift, combined in analysis.combined_scores():
+        candidate = engine.caesar_decrypt(text, shift)
+        expected = (engine.calculate_enhanced_score(candidate) + engine.calculate_readability(candidate)
+                    + engine.calculate_word_score(candidate))
+        assert combined == pytest.approx(expected)
+
+
+def test_array_and_list_tables_score_the_same():
+    engine = CaesarEngine()
+    text = caesar_encrypt("The quick brown fox jumps over the lazy dog, then the dog sleeps. " * 20, 9)
+    counts = engine.count_ngrams(text)
+    listed = tuple(part if isinstance(part, int) else as_list(part) for part in counts)
+    for shift in range(26):
+        assert engine.score_counts(counts, shift) == engine.score_counts(listed, shift)
+        assert engine.pattern_matches(counts, shift) == engine.pattern_matches(listed, shift)
+        assert engine.shift_frequency(counts, shift) == engine.shift_frequency(listed, shift)
+
+
+@pytest.mark.parametrize('numpy', [True, False])
+def test_blocked_counts_match_one_block(numpy, monkeypatch):
+    if not numpy:
+        monkeypatch.setattr(cipher_core, '_NUMPY', [None])
+    rng = random.Random(3)
+    engine = CaesarEngine()
+    for text in ['', 'A', 'AB', 'ABC', random_text(rng, 500), random_text(rng, 500).replace('é', '')]:
+        expected = as_lists(engine.count_ngrams(text))
+        monkeypatch.setattr(cipher_core, 'COUNT_BLOCK_LETTERS', 7)
+        assert as_lists(engine.count_ngrams(text)) == expected
+        monkeypatch.setattr(cipher_core, 'COUNT_BLOCK_LETTERS', 1 << 20)
+
+
+@pytest.mark.parametrize('scorer', ['enhanced', 'quadgram'])
+def test_analysis_from_chunks_matches_whole_text(scorer, monkeypatch):
+    monkeypatch.setattr(TextTally, 'TOKEN_BATCH', 4)
+    rng = random.Random(5)
+    engine = CaesarEngine(scorer)
+    engine.set_wordlist(['HELLO', 'WORLD', 'THE', 'A', 'ÉTÉ'])
+    pieces = ['hello', ' ', 'world', 'é', '\n', '  ', 'the', 'A', 'x', 'ÉTÉ', 'été.', '12']
+    for _ in range(100):
+        text = caesar_encrypt(''.join(rng.choice(pieces) for _ in range(rng.randint(0, 60))), rng.randint(0, 25))
+        size = rng.randint(1, 8)
+        whole = TextAnalysis(engine, text)
+        chunked = TextAnalysis.from_chunks(engine, (text[i:i + size] for i in range(0, len(text), size)),
+                                           head_chars=10)
+        assert chunked.text == text[:10] and chunked.length == len(text)
+        assert as_lists(chunked.counts) == as_lists(whole.counts)
+        assert chunked.word_count == whole.word_count
+        assert chunked.word_scores == whole.word_scores
+        assert chunked.readability_scores == whole.readability_scores
+        assert chunked.pattern_match_counts == whole.pattern_match_counts
+        for shift in range(1, 26):
+            assert chunked.quality_scores[shift] == pytest.approx(whole.quality_scores[shift])
+
+
+def test_shared_engine_is_built_once_per_scorer_and_wordlist(tmp_path):
+    words = tmp_path / 'words.txt'
+    words.write_text('hello\nworld  # comment\n', encoding='utf-8')
+    assert shared_engine() is shared_engine('enhanced')
+    assert shared_engine('quadgram') is not shared_engine()
+    assert shared_engine('enhanced', str(words)).common_words == {'HELLO', 'WORLD'}
+    with pytest.raises(ValueError):
+        shared_engine('bogus')
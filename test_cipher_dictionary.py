@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from cipher_dictionary import SMALL_VOCABULARY, AhoCorasick, PatternMatcher, count_overlapping, load_wordlist
+
+
+def brute_force_count(text, pattern):
+    return sum(1 for i in range(len(text) - len(pattern) + 1) if text.startswith(pattern, i))
+
+
+def random_patterns(rng, count):
+    return [''.join(rng.choice('AB C') for _ in range(rng.randint(1, 4))) for _ in range(count)]
+
+
+@pytest.mark.parametrize('vocabulary', [3, SMALL_VOCABULARY, SMALL_VOCABULARY + 1, 80])
+def test_both_matcher_paths_count_overlapping_occurrences(vocabulary):
+    rng = random.Random(vocabulary)
+    for _ in range(50):
+        patterns = random_patterns(rng, vocabulary)
+        text = ''.join(rng.choice('AB C') for _ in range(rng.randint(0, 200)))
+        matcher = PatternMatcher(patterns)
+        expected = {pattern: brute_force_count(text, pattern) for pattern in dict.fromkeys(patterns)}
+        assert matcher.count(text) == expected
+        assert matcher.matches(text) == sum(1 for count in expected.values() if count)
+
+
+def test_small_and_large_vocabularies_agree():
+    matcher = PatternMatcher(['AA', 'ABA', 'THE'])
+    assert matcher.count('AAAA ABABA') == {'AA': 3, 'ABA': 2, 'THE': 0}
+    assert AhoCorasick(['AA', 'ABA', 'THE']).count('AAAA ABABA') == matcher.count('AAAA ABABA')
+    assert count_overlapping('AAAA', 'AA') == 3
+
+
+def test_empty_patterns_are_ignored():
+    matcher = PatternMatcher(['', 'A'])
+    assert len(matcher) == 1 and matcher.count('AA') == {'A': 2}
+
+
+def test_load_wordlist(tmp_path):
+    path = tmp_path / 'words.txt'
+    path.write_text("the\nQuick  # comment\n\n# only a comment\nbrown\n", encoding='utf-8')
+    assert load_wordlist(str(path)) == frozenset({'THE', 'QUICK', 'BROWN'})
@@ -0,0 +1,78 @@
+import mmap
+import random
+
+import pytest
+
+import cipher_core
+from cipher_core import CaesarEngine, caesar_encrypt
+from cipher_histogram import FileHistogram, count_file, count_range, detect_file, file_ranges
+
+GRANULARITY = mmap.ALLOCATIONGRANULARITY
+
+
+def write_corpus(path, size, seed=0):
+    rng = random.Random(seed)
+    words = ['the', 'QUICK', 'brown', 'fox', 'a', 'I', 'jumps', 'over', 'lazy', 'dog']
+    parts = []
+    length = 0
+    while length < size:
+        # Separators of every width put letter runs across range and block joins at all offsets
+        part = rng.choice(words) + rng.choice([' ', '', '. ', '\n', '--- ', 'é '])
+        parts.append(part)
+        length += len(part)
+    text = caesar_encrypt(''.join(parts), 5)
+    path.write_text(text, encoding='utf-8')
+    return path.read_bytes()
+
+
+def ascii_only(data):
+    """data with the non-ASCII bytes removed, which the histogram skips like punctuation"""
+    return bytes(byte for byte in data if byte < 128)
+
+
+def as_lists(counts):
+    return tuple(part if isinstance(part, int) else list(part) for part in counts)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_merged_ranges_match_count_ngrams(tmp_path, workers):
+    data = write_corpus(tmp_path / 'corpus.txt', 5 * GRANULARITY + 123)
+    expected = CaesarEngine().count_ngrams(ascii_only(data))
+    histogram = count_file(str(tmp_path / 'corpus.txt'), workers=workers, range_bytes=GRANULARITY)
+    assert as_lists(histogram.counts()) == as_lists(expected)
+
+
+def test_small_blocks_and_uneven_spans_merge_exactly(tmp_path):
+    data = write_corpus(tmp_path / 'corpus.txt', 3000, seed=1)
+    expected = CaesarEngine().count_ngrams(ascii_only(data))
+    for block_bytes in (1, 2, 3, 7, 64):
+        histogram = count_range(str(tmp_path / 'corpus.txt'), 0, len(data), block_bytes=block_bytes)
+        assert as_lists(histogram.counts()) == as_lists(expected)
+
+    # Spans of zero to three letters, merged one after another
+    letters = b'ABCDEFGHIJ'
+    merged = FileHistogram()
+    cuts = [0, 0, 1, 1, 3, 4, 7, 10]
+    for start, end in zip(cuts, cuts[1:]):
+        merged.merge(FileHistogram(letters[start:end]))
+    assert as_lists(merged.counts()) == as_lists(CaesarEngine().count_ngrams(letters))
+
+
+def test_file_ranges_cover_the_file_on_granularity_boundaries():
+    ranges = file_ranges(10 * GRANULARITY + 5, 3 * GRANULARITY + 1)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 10 * GRANULARITY + 5
+    assert all(start % GRANULARITY == 0 for start, end in ranges)
+    assert all(end == next_start for (start, end), (next_start, _) in zip(ranges, ranges[1:]))
+
+
+def test_detect_file_finds_the_shift(tmp_path):
+    write_corpus(tmp_path / 'corpus.txt', 20000, seed=2)
+    shift, score, counts = detect_file(str(tmp_path / 'corpus.txt'), workers=1, range_bytes=GRANULARITY)
+    assert shift == 5
+
+
+def test_merge_without_numpy(tmp_path, monkeypatch):
+    monkeypatch.setattr(cipher_core, '_NUMPY', [None])
+    data = write_corpus(tmp_path / 'corpus.txt', 2000, seed=3)
+    histogram = count_range(str(tmp_path / 'corpus.txt'), 0, len(data), block_bytes=5)
+    assert as_lists(histogram.counts()) == as_lists(CaesarEngine().count_ngrams(ascii_only(data)))
@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+import cipher_core
+from cipher_core import CaesarEngine, caesar_encrypt
+from cipher_messages import MAX_BATCH_CHARS, best_shifts, best_single
+
+numpy = pytest.importorskip('numpy')
+
+
+def random_messages(rng, count):
+    words = sorted(CaesarEngine().common_words) + ['ZEPHYR', 'QUIXOTIC', 'café', '42', '--']
+    messages = []
+    for _ in range(count):
+        length = rng.choice([0, 1, 2, 3, 5, 12, 40, 160])
+        text = ' '.join(rng.choice(words) for _ in range(length))
+        messages.append(caesar_encrypt(text, rng.randint(0, 25)))
+    messages.append('x' * (MAX_BATCH_CHARS + 1))
+    return messages
+
+
+def test_best_shifts_match_the_per_message_scorer():
+    engine = CaesarEngine()
+    messages = random_messages(random.Random(3), 1000)
+    shifts, scores = best_shifts(messages, engine)
+    for message, shift, score in zip(messages, shifts, scores):
+        expected_shift, expected_score = best_single(engine, message)
+        assert score == pytest.approx(expected_score, rel=1e-9, abs=1e-9)
+        # Ties may break either way; the chosen shift must score as well as the best one
+        assert engine.score_counts(engine.count_ngrams(message), int(shift)) == pytest.approx(expected_score)
+
+
+def test_best_shifts_reuse_the_engine_scorer():
+    engine = CaesarEngine()
+    best_shifts(['KHOOR'], engine)
+    scorer = engine.message_scorer()
+    best_shifts(['ZRUOG'], engine)
+    assert engine.message_scorer() is scorer
+
+
+def test_best_shifts_without_numpy(monkeypatch):
+    monkeypatch.setattr(cipher_core, '_NUMPY', [None])
+    shifts, scores = best_shifts(['WKH TXLFN EURZQ IRA MXPSV RYHU WKH ODCB GRJ'])
+    assert shifts == [3]
@@ -0,0 +1,21 @@
+import pytest
+
+import cipher_profiling
+
+
+@pytest.mark.parametrize('value, enabled', [(None, False), ('', False), ('0', False), ('false', False),
+                                            (' Off ', False), ('no', False), ('1', True), ('yes', True)])
+def test_env_var_off_values(value, enabled, monkeypatch):
+    if value is None:
+        monkeypatch.delenv(cipher_profiling.ENV_VAR, raising=False)
+    else:
+        monkeypatch.setenv(cipher_profiling.ENV_VAR, value)
+    assert cipher_profiling.env_enabled() is enabled
+
+
+def test_nearest_rank_percentile():
+    values = list(range(1, 101))
+    assert cipher_profiling.percentile(values, 0.50) == 50
+    assert cipher_profiling.percentile(values, 0.99) == 99
+    assert cipher_profiling.percentile(values, 1.0) == 100
+    assert cipher_profiling.percentile([7], 0.0) == 7
@@ -0,0 +1,32 @@
+import io
+import json
+import re
+
+from cipher_core import SAMPLE_TEXTS, CaesarEngine
+from cipher_report import ReportWriter, TextFile, write_report
+
+
+def test_text_file_report_matches_in_memory_report(tmp_path):
+    text = '\n'.join(ciphertext for name, ciphertext in SAMPLE_TEXTS) * 20 + '\nÉté déjà vu  '
+    path = tmp_path / 'secret.txt'
+    path.write_text(text, encoding='utf-8')
+    engine = CaesarEngine()
+    for fmt in ('json', 'jsonl', 'text'):
+        for decoded in ('full', 'preview'):
+            outputs = []
+            for source in (text, TextFile(str(path))):
+                out = tmp_path / f'report.{fmt}'
+                write_report(engine, source, str(out), decoded, chunk_size=37, fmt=fmt)
+                report = out.read_text(encoding='utf-8')
+                outputs.append(re.sub(r'("timestamp": |Generated: )"?[0-9T:.-]+"?', '', report))
+            assert outputs[0] == outputs[1]
+
+
+def test_decoded_text_is_written_in_chunks():
+    text = SAMPLE_TEXTS[0][1]
+    engine = CaesarEngine()
+    out = io.StringIO()
+    ReportWriter(out, 'json', chunk_size=5).write(text, engine.analyze(text))
+    report = json.loads(out.getvalue())
+    assert report['input_length'] == len(text)
+    assert report['analysis']['shift_3']['decoded_text'].startswith('THE QUICK BROWN FOX')
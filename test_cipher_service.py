@@ -0,0 +1,69 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import cipher_service
+from cipher_service import DecodeService, RequestBatcher, handle_batch
+
+
+def test_bad_job_does_not_fail_its_batch():
+    overflow = json.loads('{"text": "abc", "shift": 1e400}')
+    results = handle_batch([('/decode', {'text': 'KHOOR', 'shift': 3}), ('/decode', overflow),
+                            ('/detect', {'text': 'WKH TXLFN EURZQ IRA'})])
+    assert results[0][0] == 200 and json.loads(results[0][1])['decoded'] == 'HELLO'
+    assert results[1][0] == 400 and 'error' in json.loads(results[1][1])
+    assert results[2][0] == 200 and 'shift' in json.loads(results[2][1])
+
+
+def test_unexpected_error_is_a_500_for_that_job(monkeypatch):
+    def broken(text, shift):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(cipher_service, 'caesar_decrypt', broken)
+    results = handle_batch([('/decode', {'text': 'KHOOR', 'shift': 3}), ('/report', {'text': 'KHOOR'})])
+    assert results[0][0] == 500 and 'boom' in json.loads(results[0][1])['error']
+    assert results[1][0] == 200
+
+
+async def _exchange(payloads):
+    """Send raw requests to a service on an ephemeral port; returns everything read back"""
+    executor = ThreadPoolExecutor(max_workers=1)
+    service = DecodeService(RequestBatcher(executor, batch_size=8, batch_window=0.01))
+    server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        async with server:
+            replies = []
+            for payload in payloads:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(payload)
+                await writer.drain()
+                writer.write_eof()
+                replies.append(await asyncio.wait_for(reader.read(), 5))
+                writer.close()
+            return replies
+    finally:
+        executor.shutdown()
+
+
+def test_batched_requests_survive_a_bad_neighbour():
+    async def run():
+        executor = ThreadPoolExecutor(max_workers=1)
+        batcher = RequestBatcher(executor, batch_size=2, batch_window=1)
+        try:
+            return await asyncio.gather(batcher.submit(('/decode', {'text': 'KHOOR', 'shift': 3})),
+                                        batcher.submit(('/decode', json.loads('{"text": "x", "shift": 1e400}'))))
+        finally:
+            executor.shutdown()
+
+    good, bad = asyncio.run(run())
+    assert good[0] == 200 and bad[0] == 400
+
+
+def test_short_body_closes_the_connection_cleanly():
+    body = b'{"text": "KHOOR", "shift": 3}'
+    short = b'POST /decode HTTP/1.1\r\nContent-Length: 100\r\n\r\n' + body
+    full = (b'POST /decode HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n' % len(body)) + body
+    short_reply, full_reply = asyncio.run(_exchange([short, full]))
+    assert short_reply == b''
+    assert full_reply.startswith(b'HTTP/1.1 200 OK') and b'HELLO' in full_reply